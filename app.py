@@ -12,16 +12,26 @@ Date: 2025
 Version: 2.0 - Correctifs d'affichage appliqués
 """
 
+import io
 import os
 import json
+import atexit
 import logging
-import traceback
+import queue
+import signal
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 # Imports Flask
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 # Imports pour la génération de données
@@ -29,15 +39,332 @@ import pandas as pd
 import numpy as np
 from faker import Faker
 
-# Configuration du logging
+# Sérialisation JSON rapide (optionnelle)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Compression gzip/brotli des réponses (optionnelle)
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+# Écriture Parquet par row groups (optionnelle)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Noyau compilé de la matrice de consommation (optionnel)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Serveur WSGI de production (optionnel, Linux/macOS)
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+# Configuration du logging (LOGLEVEL=WARNING pour taire bannières et logs d'information)
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.environ.get('LOGLEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+
+# Écritures des logs déportées dans un thread : les requêtes ne font qu'empiler
+_log_handlers = list(logging.getLogger().handlers)
+
+
+def _start_log_listener() -> QueueListener:
+    """Branche le logger racine sur une nouvelle file et démarre son thread d'écriture"""
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *_log_handlers, respect_handler_level=True)
+    logging.getLogger().handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
+def _stop_log_listener() -> None:
+    """Vide la file de logs du processus courant à la sortie"""
+    _log_listener.stop()
+
+
+_log_listener = _start_log_listener()
+atexit.register(_stop_log_listener)
+
 logger = logging.getLogger(__name__)
 
+# Classification des types de bâtiments OSM en catégories énergétiques
+OSM_BUILDING_CLASSES = {
+    'house': 'residential',
+    'residential': 'residential',
+    'apartment': 'residential',
+    'apartments': 'residential',
+    'shop': 'commercial',
+    'retail': 'commercial',
+    'commercial': 'commercial',
+    'office': 'commercial',
+    'industrial': 'industrial',
+    'warehouse': 'industrial',
+    'factory': 'industrial',
+    'school': 'public',
+    'hospital': 'public',
+    'government': 'public',
+    'public': 'public'
+}
+
+# Colonnes des séries temporelles renvoyées au frontend
+TIMESERIES_COLUMNS = [
+    'unique_id', 'building_id', 'ds', 'timestamp', 'y', 'consumption_kwh',
+    'building_class', 'location', 'state'
+]
+
+@lru_cache(maxsize=8)
+def _date_components(start_date: str, end_date: str, freq: str) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Construit la plage de dates et ses composantes, mises en cache par (début, fin, fréquence)
+    
+    Args:
+        start_date: Date de début (YYYY-MM-DD)
+        end_date: Date de fin (YYYY-MM-DD)
+        freq: Fréquence ('H', 'D', 'W', 'M')
+        
+    Returns:
+        Tuple: (plage de dates, mois, heures, jours de la semaine, ds formatés, timestamps ISO),
+        tableaux en lecture seule car partagés entre les appels
+    """
+    date_range = pd.date_range(start=start_date, end=end_date, freq=freq)
+    
+    # Indices des tables de facteurs : int8 suffit (mois, heure, jour) et réduit la bande passante
+    months = date_range.month.to_numpy(dtype=np.int8)
+    hours = date_range.hour.to_numpy(dtype=np.int8)
+    dayofweek = date_range.dayofweek.to_numpy(dtype=np.int8)
+    ds_values = np.array(
+        date_range.strftime('%Y-%m-%d %H:%M:%S' if freq == 'H' else '%Y-%m-%d').tolist(), dtype=object
+    )
+    iso_values = np.array(date_range.strftime('%Y-%m-%dT%H:%M:%S').tolist(), dtype=object)
+    
+    components = (months, hours, dayofweek, ds_values, iso_values)
+    for array in components:
+        array.setflags(write=False)
+    return (date_range,) + components
+
+# Volume (bâtiments x horodatages) à partir duquel bruit et consommation sont calculés en parallèle
+PARALLEL_NOISE_THRESHOLD = 200_000
+
+
+def _parallel_row_blocks(shape: Tuple[int, int]) -> List[np.ndarray]:
+    """
+    Découpe les lignes d'une matrice en blocs, un par thread
+
+    Retourne un seul bloc sous PARALLEL_NOISE_THRESHOLD ou sur une machine mono-cœur.
+    """
+    num_workers = min(os.cpu_count() or 1, shape[0])
+    if num_workers < 2 or shape[0] * shape[1] < PARALLEL_NOISE_THRESHOLD:
+        return [np.arange(shape[0])]
+    return np.array_split(np.arange(shape[0]), num_workers)
+
+
+def _run_row_blocks(blocks: List[np.ndarray], fill) -> None:
+    """Applique `fill(worker, lignes)` à chaque bloc, dans des threads s'il y en a plusieurs"""
+    if len(blocks) == 1:
+        fill(0, slice(0, len(blocks[0])))
+        return
+    with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+        list(executor.map(
+            lambda worker: fill(worker, slice(blocks[worker][0], blocks[worker][-1] + 1)),
+            range(len(blocks))
+        ))
+
+
+def _standard_normal_matrix(shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Tire une matrice de bruit gaussien centré réduit
+    
+    Au-delà de PARALLEL_NOISE_THRESHOLD, les lignes sont réparties en blocs tirés
+    dans des threads (NumPy libère le GIL) avec des générateurs indépendants, dont
+    les graines dérivent de l'état global de np.random.
+    """
+    blocks = _parallel_row_blocks(shape)
+    if len(blocks) == 1:
+        return np.random.normal(0, 1, size=shape)
+    
+    seed_sequence = np.random.SeedSequence(np.random.randint(0, 2**32, size=4))
+    generators = [np.random.default_rng(seed) for seed in seed_sequence.spawn(len(blocks))]
+    noise = np.empty(shape)
+    
+    def fill(worker: int, rows: slice) -> None:
+        generators[worker].standard_normal(out=noise[rows])
+    
+    _run_row_blocks(blocks, fill)
+    return noise
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _consumption_kernel(noise, class_profiles, class_codes, base_consumption, noise_scale):
+        """Version compilée de _consumption_matrix : une seule passe par élément, bâtiments en parallèle"""
+        for b in prange(noise.shape[0]):
+            profile = class_profiles[class_codes[b]]
+            scale = noise_scale[b]
+            base = base_consumption[b]
+            for t in range(noise.shape[1]):
+                value = (noise[b, t] * scale + 1.0) * profile[t] * base
+                # Même arrondi que np.round(..., 2) : rint(x * 100) / 100
+                noise[b, t] = np.rint(max(value, value * 0.1) * 100.0) / 100.0
+
+
+def _consumption_matrix(noise: np.ndarray, class_profiles: np.ndarray, class_codes: np.ndarray,
+                        base_consumption: np.ndarray, noise_scale: np.ndarray) -> np.ndarray:
+    """
+    Combine profils par type, consommation de base et bruit en consommation (bâtiments x horodatages)
+
+    Le calcul se fait en place dans `noise`, bloc de lignes par bloc de lignes : chaque
+    bâtiment est indépendant, les blocs sont traités dans des threads (ufuncs NumPy
+    sans GIL) et aucune matrice intermédiaire de taille B x T n'est allouée. Avec numba,
+    un noyau compilé fusionne ces opérations en une seule passe.
+    """
+    if NUMBA_AVAILABLE:
+        _consumption_kernel(noise, class_profiles, class_codes, base_consumption, noise_scale)
+        return noise
+    return _consumption_matrix_numpy(noise, class_profiles, class_codes, base_consumption, noise_scale)
+
+
+def _consumption_matrix_numpy(noise: np.ndarray, class_profiles: np.ndarray, class_codes: np.ndarray,
+                              base_consumption: np.ndarray, noise_scale: np.ndarray) -> np.ndarray:
+    """Implémentation NumPy de _consumption_matrix (en place, par blocs de lignes en threads)"""
+    def fill(worker: int, rows: slice) -> None:
+        block = noise[rows]
+        block *= noise_scale[rows, None]
+        block += 1
+        block *= class_profiles[class_codes[rows]]
+        block *= base_consumption[rows, None]
+        # Assurer une consommation minimale positive
+        np.maximum(block, block * 0.1, out=block)
+        np.round(block, 2, out=block)
+
+    _run_row_blocks(_parallel_row_blocks(noise.shape), fill)
+    return noise
+
+
+def _repeat_categorical(values: List[str], repeats: int) -> pd.Categorical:
+    """Répète chaque valeur `repeats` fois sous forme catégorielle, sans chaînes intermédiaires"""
+    categorical = pd.Categorical(values)
+    return pd.Categorical.from_codes(np.repeat(categorical.codes, repeats), categorical.categories)
+
+def _tile_categorical(values: np.ndarray, repeats: int) -> pd.Categorical:
+    """Répète la séquence `values` `repeats` fois sous forme catégorielle (codes entiers contigus)"""
+    categorical = pd.Categorical(values)
+    return pd.Categorical.from_codes(np.tile(categorical.codes, repeats), categorical.categories)
+
 # ==================== CONFIGURATION DE L'APPLICATION ====================
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON Flask basé sur orjson
+    
+    Sérialise nativement les scalaires et tableaux NumPy, ce qui évite les
+    conversions manuelles dans les statistiques renvoyées par jsonify.
+    """
+    
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if ORJSON_AVAILABLE else 0
+    
+    @staticmethod
+    def default(obj: Any) -> Any:
+        """Types pandas/NumPy non gérés par orjson, puis repli sur Flask (Decimal, UUID, dates...)"""
+        if obj is pd.NaT or obj is pd.NA:
+            return None
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return DefaultJSONProvider.default(obj)
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+
+# Valeurs de PROFILE qui activent le profilage (toute autre valeur est ignorée)
+PROFILE_MODES = ('1', 'pyinstrument')
+
+
+def _profile_mode() -> Optional[str]:
+    """
+    Lit le mode de profilage demandé par la variable d'environnement PROFILE
+    
+    Returns:
+        Optional[str]: '1' ou 'pyinstrument', None si le profilage est désactivé
+    """
+    mode = os.environ.get('PROFILE')
+    if not mode:
+        return None
+    if mode not in PROFILE_MODES:
+        logger.warning("⚠️ PROFILE=%r ignoré (valeurs acceptées: %s)", mode, ', '.join(PROFILE_MODES))
+        return None
+    return mode
+
+
+def _install_profiler(app: Flask, mode: str, profile_dir: str) -> None:
+    """
+    Active le profilage par requête (PROFILE=1 : cProfile, PROFILE=pyinstrument)
+    
+    Avec pyinstrument, le profileur est arrêté dans after_request, avant que le
+    corps d'une réponse en flux ne soit produit : pour /generate-stream, /download/json
+    et les grosses réponses de /generate, seule la partie exécutée avant l'envoi est
+    profilée. ProfilerMiddleware (PROFILE=1) couvre l'itération complète du corps.
+    
+    Args:
+        app: Application Flask à instrumenter
+        mode: '1' pour ProfilerMiddleware (fichiers .prof), 'pyinstrument' pour des rapports HTML
+        profile_dir: Dossier de sortie des profils
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    
+    if mode == 'pyinstrument':
+        from flask import g
+        from pyinstrument import Profiler
+        
+        @app.before_request
+        def _start_profiler():
+            g.profiler = Profiler()
+            g.profiler.start()
+        
+        @app.after_request
+        def _stop_profiler(response):
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.stop()
+                filename = f"{request.method}.{request.path.strip('/').replace('/', '.') or 'root'}.{uuid.uuid4().hex[:8]}.html"
+                with open(os.path.join(profile_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+            return response
+    else:
+        from werkzeug.middleware.profiler import ProfilerMiddleware
+        app.wsgi_app = ProfilerMiddleware(app.wsgi_app, profile_dir=profile_dir, restrictions=[30])
+    
+    logger.info(f"🔬 Profilage actif ({mode}) → {profile_dir}")
+
+
 def create_app() -> Flask:
     """
     Crée et configure l'application Flask
@@ -47,15 +374,36 @@ def create_app() -> Flask:
     """
     app = Flask(__name__)
     
+    if ORJSON_AVAILABLE:
+        app.json_provider_class = OrjsonProvider
+        app.json = OrjsonProvider(app)
+    
     # Configuration
     app.config.update({
         'SECRET_KEY': os.environ.get('SECRET_KEY', 'malaysia-energy-generator-key-2025'),
         'DEBUG': os.environ.get('FLASK_DEBUG', 'False').lower() == 'true',
         'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,  # 16MB max file size
         'JSON_SORT_KEYS': False,
-        'JSONIFY_PRETTYPRINT_REGULAR': True
+        'JSONIFY_PRETTYPRINT_REGULAR': True,
+        # Fichiers statiques (CSS/JS) servis avec un max-age d'une heure : pas de revalidation à chaque page
+        'SEND_FILE_MAX_AGE_DEFAULT': 3600,
+        # Compression des réponses JSON/NDJSON (payloads très répétitifs)
+        'COMPRESS_MIMETYPES': ['application/json', 'application/x-ndjson', 'application/vnd.apache.arrow.stream'],
+        'COMPRESS_LEVEL': 6,
+        'COMPRESS_MIN_SIZE': 1024,
+        # Réponses en flux non compressées : Flask-Compress consommerait tout le générateur
+        # (response.get_data()) avant d'envoyer le premier octet
+        'COMPRESS_STREAMS': False
     })
     
+    if COMPRESS_AVAILABLE:
+        Compress(app)
+    
+    # Profilage à la demande, sans coût lorsqu'il est désactivé
+    app.config['PROFILE'] = _profile_mode()
+    if app.config['PROFILE']:
+        _install_profiler(app, app.config['PROFILE'], os.environ.get('PROFILE_DIR', './prof'))
+    
     # CORS pour le développement
     CORS(app, resources={
         r"/api/*": {"origins": "*"},
@@ -79,6 +427,12 @@ class MalaysiaDataGenerator:
         self.faker = Faker(['en_US'])
         self.malaysia_cities = self._load_malaysia_cities()
         self.building_types = self._define_building_types()
+        self._profile_tables_cache: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._type_params, self._class_to_code = self._build_type_parameters()
+        # Préfixes des identifiants uniques par état, calculés une fois pour toutes les villes
+        self._state_id_prefixes = {
+            city['state']: f"MY_{city['state'][:3].upper()}_" for city in self.malaysia_cities.values()
+        }
         
     def _load_malaysia_cities(self) -> Dict[str, Dict]:
         """
@@ -172,6 +526,24 @@ class MalaysiaDataGenerator:
             }
         }
     
+    def _build_type_parameters(self) -> Tuple[np.ndarray, Dict[str, int]]:
+        """
+        Regroupe les paramètres numériques des types de bâtiments dans un tableau structuré
+        
+        Returns:
+            Tuple: (tableau structuré indexé par code de type, correspondance type -> code)
+        """
+        type_params = np.array(
+            [
+                (building_type, config['base_consumption'], config['variance'], config['probability'])
+                for building_type, config in self.building_types.items()
+            ],
+            dtype=[('cls', 'U20'), ('base', 'f8'), ('variance', 'f8'), ('probability', 'f8')]
+        )
+        type_params.setflags(write=False)
+        class_to_code = {building_type: code for code, building_type in enumerate(self.building_types)}
+        return type_params, class_to_code
+    
     def generate_buildings_metadata(self, 
                                   num_buildings: int, 
                                   location: str = 'Kuala Lumpur',
@@ -189,109 +561,223 @@ class MalaysiaDataGenerator:
         """
         logger.info(f"Génération de {num_buildings} bâtiments pour {location}")
         
-        buildings = []
         city_data = self.malaysia_cities.get(location, self.malaysia_cities['Kuala Lumpur'])
         
         # Utiliser les bâtiments OSM si disponibles
         if osm_buildings and len(osm_buildings) > 0:
             logger.info(f"Utilisation de {len(osm_buildings)} bâtiments OSM")
-            for i, osm_building in enumerate(osm_buildings[:num_buildings]):
-                building = self._create_building_from_osm(osm_building, city_data, i)
-                buildings.append(building)
+            buildings = self._create_osm_buildings(osm_buildings[:num_buildings], city_data)
         else:
             # Générer des bâtiments synthétiques
             logger.info("Génération de bâtiments synthétiques")
-            for i in range(num_buildings):
-                building = self._create_synthetic_building(city_data, i)
-                buildings.append(building)
+            buildings = self._create_synthetic_buildings(city_data, num_buildings)
         
         logger.info(f"✅ {len(buildings)} bâtiments générés avec succès")
         return buildings
     
-    def _create_building_from_osm(self, osm_building: Dict, city_data: Dict, index: int) -> Dict:
+    def _state_id_prefix(self, state: str) -> str:
         """
-        Crée un bâtiment à partir de données OSM
+        Préfixe des identifiants uniques pour un état (précalculé dans __init__)
         
         Args:
-            osm_building: Données OSM du bâtiment
-            city_data: Données de la ville
-            index: Index du bâtiment
+            state: Nom de l'état
             
         Returns:
-            Dict: Métadonnées du bâtiment
+            str: Préfixe de la forme MY_XXX_
         """
-        # Déterminer le type de bâtiment
-        osm_type = osm_building.get('type', 'residential')
-        building_class = osm_building.get('building_class', self._classify_osm_building(osm_type))
-        
-        # Calculer la surface estimée
-        estimated_area = osm_building.get('estimated_area', np.random.normal(150, 50))
-        estimated_area = max(50, estimated_area)  # Minimum 50m²
+        prefix = self._state_id_prefixes.get(state)
+        if prefix is None:
+            prefix = self._state_id_prefixes[state] = f"MY_{state[:3].upper()}_"
+        return prefix
+    
+    def _draw_osm_attributes(self, num_buildings: int) -> Dict[str, List]:
+        """
+        Tire en une seule fois les valeurs aléatoires de repli des bâtiments OSM
         
+        Args:
+            num_buildings: Nombre de bâtiments OSM
+            
+        Returns:
+            Dict[str, List]: Valeurs tirées par attribut, une entrée par bâtiment
+        """
         return {
-            'unique_id': f"MY_{city_data['state'][:3].upper()}_{osm_building.get('id', uuid.uuid4().hex[:8])}",
-            'building_id': osm_building.get('id', f"osm_{index}"),
-            'building_class': building_class,
-            'building_type': osm_building.get('type', 'residential'),
-            'location': osm_building.get('location', city_data.get('name', 'Unknown')),
-            'state': osm_building.get('state', city_data['state']),
-            'latitude': self._extract_lat_from_osm(osm_building, city_data['lat']),
-            'longitude': self._extract_lon_from_osm(osm_building, city_data['lon']),
-            'area_sqm': round(estimated_area, 2),
-            'floors': osm_building.get('floors', np.random.randint(1, 5)),
-            'year_built': np.random.randint(1980, 2024),
-            'population': city_data['population'],
-            'data_source': 'osm',
-            'data_quality': 'official',
-            'generation_timestamp': datetime.now().isoformat(),
-            'tags': osm_building.get('tags', {}),
-            'geometry_available': bool(osm_building.get('geometry'))
+            'area_sqm': np.random.normal(150, 50, size=num_buildings).tolist(),
+            'floors': np.random.randint(1, 5, size=num_buildings).tolist(),
+            'year_built': np.random.randint(1980, 2024, size=num_buildings).tolist(),
+            # Décalages appliqués aux coordonnées de la ville sans géométrie OSM
+            'lat_offset': np.random.normal(0, 0.01, size=num_buildings).tolist(),
+            'lon_offset': np.random.normal(0, 0.01, size=num_buildings).tolist(),
+            # Identifiants de repli (8 caractères hexadécimaux) lus en un seul appel système
+            'fallback_id': [
+                f"{value:08x}"
+                for value in np.frombuffer(os.urandom(4 * num_buildings), dtype=np.uint32).tolist()
+            ]
         }
     
-    def _create_synthetic_building(self, city_data: Dict, index: int) -> Dict:
+    def _create_osm_buildings(self, osm_buildings: List[Dict], city_data: Dict) -> List[Dict]:
         """
-        Crée un bâtiment synthétique
+        Crée les bâtiments à partir des données OSM en une passe
         
         Args:
+            osm_buildings: Données OSM des bâtiments retenus
             city_data: Données de la ville
-            index: Index du bâtiment
             
         Returns:
-            Dict: Métadonnées du bâtiment
+            List[Dict]: Métadonnées des bâtiments
         """
-        # Sélectionner le type de bâtiment selon les probabilités
-        building_class = np.random.choice(
-            list(self.building_types.keys()),
-            p=[self.building_types[t]['probability'] for t in self.building_types.keys()]
-        )
+        attributes = self._draw_osm_attributes(len(osm_buildings))
+        
+        # Valeurs communes à tous les bâtiments, évaluées une seule fois
+        id_prefix = self._state_id_prefix(city_data['state'])
+        default_location = city_data.get('name', 'Unknown')
+        state = city_data['state']
+        default_lat = city_data['lat']
+        default_lon = city_data['lon']
+        population = city_data['population']
+        generation_timestamp = datetime.now().isoformat()
+        
+        buildings = []
+        for index, (osm_building, area_sqm, floors, year_built, lat_offset, lon_offset, fallback_id) in enumerate(zip(
+            osm_buildings, attributes['area_sqm'], attributes['floors'], attributes['year_built'],
+            attributes['lat_offset'], attributes['lon_offset'], attributes['fallback_id']
+        )):
+            # Déterminer le type de bâtiment (classification seulement si OSM ne la fournit pas)
+            osm_type = osm_building.get('type', 'residential')
+            if 'building_class' in osm_building:
+                building_class = osm_building['building_class']
+            else:
+                building_class = OSM_BUILDING_CLASSES.get(osm_type.lower(), 'residential')
+            
+            # Surface estimée, minimum 50m²
+            estimated_area = max(50, osm_building.get('estimated_area', area_sqm))
+            
+            # Identifiant aléatoire pré-tiré utilisé seulement si OSM n'en fournit pas
+            osm_id = osm_building.get('id')
+            if osm_id is None:
+                osm_id = fallback_id
+            
+            # Coordonnées du premier point de la géométrie, sinon ville décalée aléatoirement
+            geometry = osm_building.get('geometry')
+            if geometry:
+                latitude = round(geometry[0].get('lat', default_lat), 6)
+                longitude = round(geometry[0].get('lon', default_lon), 6)
+            else:
+                latitude = round(default_lat + lat_offset, 6)
+                longitude = round(default_lon + lon_offset, 6)
+            
+            buildings.append({
+                'unique_id': f"{id_prefix}{osm_id}",
+                'building_id': osm_building.get('id', f"osm_{index}"),
+                'building_class': building_class,
+                'building_type': osm_type,
+                'location': osm_building.get('location', default_location),
+                'state': osm_building.get('state', state),
+                'latitude': latitude,
+                'longitude': longitude,
+                'area_sqm': round(estimated_area, 2),
+                'floors': osm_building.get('floors', floors),
+                'year_built': year_built,
+                'population': population,
+                'data_source': 'osm',
+                'data_quality': 'official',
+                'generation_timestamp': generation_timestamp,
+                'tags': osm_building.get('tags', {}),
+                'geometry_available': bool(geometry)
+            })
+        return buildings
+    
+    def _draw_synthetic_attributes(self, city_data: Dict, num_buildings: int) -> Dict[str, List]:
+        """
+        Tire en une seule fois les attributs aléatoires de tous les bâtiments synthétiques
+        
+        Args:
+            city_data: Données de la ville
+            num_buildings: Nombre de bâtiments
+            
+        Returns:
+            Dict[str, List]: Valeurs tirées par attribut, une entrée par bâtiment
+        """
+        building_types = self._type_params['cls'].tolist()
         
-        # Générer des coordonnées dans un rayon de la ville
-        lat_offset = np.random.normal(0, 0.05)  # ~5km de variance
-        lon_offset = np.random.normal(0, 0.05)
+        # Sélectionner le type de bâtiment selon les probabilités : codes entiers tirés
+        # en bloc puis décodés, sans tableau intermédiaire de chaînes NumPy
+        class_codes = np.random.choice(
+            len(building_types),
+            size=num_buildings,
+            p=self._type_params['probability']
+        ).astype(np.int8)
+        type_names = [self.building_types[t]['name'] for t in building_types]
+        
+        # Générer des coordonnées dans un rayon de la ville (~5km de variance)
+        lat_offsets = np.random.normal(0, 0.05, size=num_buildings)
+        lon_offsets = np.random.normal(0, 0.05, size=num_buildings)
         
         return {
-            'unique_id': f"MY_{city_data['state'][:3].upper()}_{uuid.uuid4().hex[:8]}",
-            'building_id': f"synthetic_{index:06d}",
-            'building_class': building_class,
-            'building_type': self.building_types[building_class]['name'],
-            'location': list(self.malaysia_cities.keys())[0] if isinstance(city_data, dict) else city_data.get('name', 'Unknown'),
-            'state': city_data['state'],
-            'latitude': round(city_data['lat'] + lat_offset, 6),
-            'longitude': round(city_data['lon'] + lon_offset, 6),
-            'area_sqm': round(np.random.lognormal(5, 0.5), 2),  # Distribution log-normale pour la surface
-            'floors': np.random.choice([1, 2, 3, 4, 5], p=[0.4, 0.3, 0.15, 0.1, 0.05]),
-            'year_built': np.random.randint(1970, 2024),
-            'population': city_data['population'],
-            'data_source': 'synthetic',
-            'data_quality': 'estimated',
-            'generation_timestamp': datetime.now().isoformat()
+            'building_class': [building_types[code] for code in class_codes.tolist()],
+            'building_type': [type_names[code] for code in class_codes.tolist()],
+            'latitude': np.round(city_data['lat'] + lat_offsets, 6).tolist(),
+            'longitude': np.round(city_data['lon'] + lon_offsets, 6).tolist(),
+            # Distribution log-normale pour la surface
+            'area_sqm': np.round(np.random.lognormal(5, 0.5, size=num_buildings), 2).tolist(),
+            'floors': np.random.choice([1, 2, 3, 4, 5], size=num_buildings, p=[0.4, 0.3, 0.15, 0.1, 0.05]).tolist(),
+            'year_built': np.random.randint(1970, 2024, size=num_buildings).tolist()
         }
     
+    def _create_synthetic_buildings(self, city_data: Dict, num_buildings: int) -> List[Dict]:
+        """
+        Crée les bâtiments synthétiques à partir de colonnes construites en bloc
+        
+        Args:
+            city_data: Données de la ville
+            num_buildings: Nombre de bâtiments
+            
+        Returns:
+            List[Dict]: Métadonnées des bâtiments
+        """
+        attributes = self._draw_synthetic_attributes(city_data, num_buildings)
+        
+        # Identifiants générés en une passe (8 caractères hexadécimaux aléatoires)
+        id_prefix = self._state_id_prefix(city_data['state'])
+        random_ids = np.random.randint(0, 2**32, size=num_buildings, dtype=np.int64).tolist()
+        unique_ids = [f"{id_prefix}{value:08x}" for value in random_ids]
+        
+        # Champs communs à tous les bâtiments, évalués une seule fois
+        location = list(self.malaysia_cities.keys())[0] if isinstance(city_data, dict) else city_data.get('name', 'Unknown')
+        state = city_data['state']
+        population = city_data['population']
+        generation_timestamp = datetime.now().isoformat()
+        
+        return [
+            {
+                'unique_id': unique_id,
+                'building_id': f"synthetic_{index:06d}",
+                'building_class': building_class,
+                'building_type': building_type,
+                'location': location,
+                'state': state,
+                'latitude': latitude,
+                'longitude': longitude,
+                'area_sqm': area_sqm,
+                'floors': floors,
+                'year_built': year_built,
+                'population': population,
+                'data_source': 'synthetic',
+                'data_quality': 'estimated',
+                'generation_timestamp': generation_timestamp
+            }
+            for index, (unique_id, building_class, building_type, latitude, longitude,
+                        area_sqm, floors, year_built) in enumerate(zip(
+                unique_ids, attributes['building_class'], attributes['building_type'],
+                attributes['latitude'], attributes['longitude'], attributes['area_sqm'],
+                attributes['floors'], attributes['year_built']
+            ))
+        ]
+    
     def generate_consumption_timeseries(self, 
                                       buildings: List[Dict], 
                                       start_date: str, 
                                       end_date: str, 
-                                      freq: str = 'D') -> List[Dict]:
+                                      freq: str = 'D') -> pd.DataFrame:
         """
         Génère les séries temporelles de consommation électrique
         
@@ -302,147 +788,209 @@ class MalaysiaDataGenerator:
             freq: Fréquence ('H', 'D', 'W', 'M')
             
         Returns:
-            List[Dict]: Données de consommation temporelles
+            pd.DataFrame: Données de consommation temporelles (une ligne par mesure)
         """
         logger.info(f"Génération des séries temporelles du {start_date} au {end_date} (freq: {freq})")
         
-        # Créer la plage de dates
-        date_range = pd.date_range(
-            start=start_date, 
-            end=end_date, 
-            freq=freq
+        # Plage de dates et composantes temporelles (vectorisées, en cache)
+        date_range, months, hours, dayofweek, ds_values, iso_values = _date_components(
+            start_date, end_date, freq
         )
         
-        timeseries_data = []
-        total_records = len(buildings) * len(date_range)
-        
-        logger.info(f"Génération de {total_records} enregistrements pour {len(buildings)} bâtiments")
-        
-        for building in buildings:
-            building_type = building.get('building_class', 'residential')
-            type_config = self.building_types.get(building_type, self.building_types['residential'])
-            
-            # Calculer la consommation de base selon la surface
-            area = building.get('area_sqm', 100)
-            base_consumption = type_config['base_consumption'] * (area / 100)
-            
-            for timestamp in date_range:
-                consumption = self._calculate_consumption(
-                    base_consumption=base_consumption,
-                    timestamp=timestamp,
-                    building_type=building_type,
-                    type_config=type_config,
-                    freq=freq
-                )
-                
-                record = {
-                    'unique_id': building['unique_id'],
-                    'building_id': building['building_id'],
-                    'ds': timestamp.strftime('%Y-%m-%d %H:%M:%S') if freq == 'H' else timestamp.strftime('%Y-%m-%d'),
-                    'timestamp': timestamp.isoformat(),
-                    'y': round(consumption, 2),
-                    'consumption_kwh': round(consumption, 2),
-                    'building_class': building_type,
-                    'location': building.get('location', 'Unknown'),
-                    'state': building.get('state', 'Unknown')
-                }
-                
-                timeseries_data.append(record)
-        
-        logger.info(f"✅ {len(timeseries_data)} enregistrements générés avec succès")
-        return timeseries_data
-    
-    def _calculate_consumption(self, 
-                             base_consumption: float, 
-                             timestamp: datetime, 
-                             building_type: str, 
-                             type_config: Dict, 
-                             freq: str) -> float:
+        num_buildings = len(buildings)
+        num_timestamps = len(date_range)
+        total_records = num_buildings * num_timestamps
+
+        logger.info(f"Génération de {total_records} enregistrements pour {num_buildings} bâtiments")
+
+        if total_records == 0:
+            return pd.DataFrame(columns=TIMESERIES_COLUMNS)
+
+        # Types de bâtiments encodés en entiers : les paramètres par type deviennent
+        # de petits tableaux indexés par code
+        class_index = pd.Categorical(
+            [building.get('building_class', 'residential') for building in buildings]
+        )
+        class_codes = class_index.codes
+        # Paramètres de chaque catégorie lus dans le tableau structuré (types inconnus -> résidentiel)
+        category_params = self._type_params[[
+            self._class_to_code.get(building_type, self._class_to_code['residential'])
+            for building_type in class_index.categories
+        ]]
+
+        # Profil temporel calculé une fois par type de bâtiment, forme (types x horodatages)
+        class_profiles = self._calculate_class_profiles(
+            building_types=list(class_index.categories),
+            months=months,
+            hours=hours,
+            dayofweek=dayofweek,
+            freq=freq
+        )
+        class_base = category_params['base']
+        class_noise = category_params['variance'] * 0.5
+
+        # Consommation de base selon la surface et bruit par bâtiment
+        areas = np.array([building.get('area_sqm', 100) for building in buildings], dtype=float)
+        base_consumption = class_base[class_codes] * (areas / 100)
+        noise_scale = class_noise[class_codes]
+
+        # Matrice (bâtiments x horodatages) calculée en place, par blocs de bâtiments
+        consumption = _consumption_matrix(
+            _standard_normal_matrix((len(buildings), num_timestamps)),
+            class_profiles, class_codes, base_consumption, noise_scale
+        )
+
+        # Colonnes par bâtiment stockées en catégories : codes entiers répétés sur
+        # tous les horodatages au lieu de B x T pointeurs vers des chaînes
+        unique_ids = _repeat_categorical(
+            [building['unique_id'] for building in buildings], num_timestamps
+        )
+        building_ids = _repeat_categorical(
+            [building['building_id'] for building in buildings], num_timestamps
+        )
+        classes = pd.Categorical.from_codes(np.repeat(class_codes, num_timestamps), class_index.categories)
+        locations = _repeat_categorical(
+            [building.get('location', 'Unknown') for building in buildings], num_timestamps
+        )
+        states = _repeat_categorical(
+            [building.get('state', 'Unknown') for building in buildings], num_timestamps
+        )
+
+        values = consumption.ravel()
+        timeseries_df = pd.DataFrame({
+            'unique_id': unique_ids,
+            'building_id': building_ids,
+            'ds': _tile_categorical(ds_values, num_buildings),
+            'timestamp': _tile_categorical(iso_values, num_buildings),
+            'y': values,
+            'consumption_kwh': values,
+            'building_class': classes,
+            'location': locations,
+            'state': states
+        }, columns=TIMESERIES_COLUMNS, copy=False)
+
+        logger.info(f"✅ {len(timeseries_df)} enregistrements générés avec succès")
+        return timeseries_df
+
+    def _profile_lookup_tables(self,
+                               building_type: str,
+                               freq: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Calcule la consommation pour un timestamp donné
-        
+        Construit les tables de facteurs d'un type de bâtiment, indexées par
+        mois (1-12), heure (0-23) et jour de la semaine (0=lundi)
+
         Args:
-            base_consumption: Consommation de base
-            timestamp: Timestamp de la mesure
             building_type: Type de bâtiment
-            type_config: Configuration du type
             freq: Fréquence des données
-            
+
         Returns:
-            float: Consommation calculée en kWh
+            Tuple: (facteurs saisonniers, facteurs horaires, facteurs journaliers)
         """
-        consumption = base_consumption
+        cache_key = (building_type, freq)
+        if cache_key in self._profile_tables_cache:
+            return self._profile_tables_cache[cache_key]
         
+        type_config = self.building_types.get(building_type, self.building_types['residential'])
+
         # Facteur saisonnier (climat tropical - consommation plus haute en saison chaude)
-        month = timestamp.month
-        if month in [3, 4, 5, 6]:  # Saison chaude
-            consumption *= type_config['seasonal_factor']
-        elif month in [11, 12, 1, 2]:  # Saison des pluies (moins de clim)
-            consumption *= 0.9
-        
+        seasonal = np.ones(13)
+        seasonal[[3, 4, 5, 6]] = type_config['seasonal_factor']
+        seasonal[[11, 12, 1, 2]] = 0.9
+
         # Facteur horaire (seulement pour fréquence horaire)
+        hourly = np.ones(24)
         if freq == 'H':
-            hour = timestamp.hour
-            if hour in type_config['peak_hours']:
-                consumption *= 1.3
-            elif hour in [22, 23, 0, 1, 2, 3, 4, 5]:  # Heures creuses
-                consumption *= 0.4
-        
+            hourly[[22, 23, 0, 1, 2, 3, 4, 5]] = 0.4
+            hourly[type_config['peak_hours']] = 1.3
+
         # Facteur jour de la semaine
-        if timestamp.weekday() < 5:  # Lundi à vendredi
-            if building_type in ['commercial', 'industrial', 'public']:
-                consumption *= 1.2
-        else:  # Weekend
-            if building_type == 'residential':
-                consumption *= 1.1
-            else:
-                consumption *= 0.6
-        
-        # Ajouter du bruit réaliste
-        noise_factor = 1 + np.random.normal(0, type_config['variance'] * 0.5)
-        consumption *= noise_factor
-        
-        # Assurer une consommation minimale positive
-        return max(consumption * 0.1, consumption)
-    
-    def _extract_lat_from_osm(self, osm_building: Dict, default_lat: float) -> float:
-        """Extrait la latitude d'un bâtiment OSM"""
-        if osm_building.get('geometry') and len(osm_building['geometry']) > 0:
-            return round(osm_building['geometry'][0].get('lat', default_lat), 6)
-        return round(default_lat + np.random.normal(0, 0.01), 6)
-    
-    def _extract_lon_from_osm(self, osm_building: Dict, default_lon: float) -> float:
-        """Extrait la longitude d'un bâtiment OSM"""
-        if osm_building.get('geometry') and len(osm_building['geometry']) > 0:
-            return round(osm_building['geometry'][0].get('lon', default_lon), 6)
-        return round(default_lon + np.random.normal(0, 0.01), 6)
-    
-    def _classify_osm_building(self, osm_type: str) -> str:
-        """Classifie un type de bâtiment OSM en catégorie énergétique"""
-        classification_map = {
-            'house': 'residential',
-            'residential': 'residential',
-            'apartment': 'residential',
-            'apartments': 'residential',
-            'shop': 'commercial',
-            'retail': 'commercial',
-            'commercial': 'commercial',
-            'office': 'commercial',
-            'industrial': 'industrial',
-            'warehouse': 'industrial',
-            'factory': 'industrial',
-            'school': 'public',
-            'hospital': 'public',
-            'government': 'public',
-            'public': 'public'
-        }
-        return classification_map.get(osm_type.lower(), 'residential')
+        if building_type in ['commercial', 'industrial', 'public']:
+            weekday_factor, weekend_factor = 1.2, 0.6
+        elif building_type == 'residential':
+            weekday_factor, weekend_factor = 1.0, 1.1
+        else:
+            weekday_factor, weekend_factor = 1.0, 0.6
+        daily = np.array([weekday_factor] * 5 + [weekend_factor] * 2)
+
+        tables = (seasonal, hourly, daily)
+        for table in tables:
+            table.setflags(write=False)
+        self._profile_tables_cache[cache_key] = tables
+        return tables
+
+    def _calculate_class_profiles(self,
+                                  building_types: List[str],
+                                  months: np.ndarray,
+                                  hours: np.ndarray,
+                                  dayofweek: np.ndarray,
+                                  freq: str) -> np.ndarray:
+        """
+        Calcule les profils multiplicatifs (saison, heure, jour) de plusieurs types
+        de bâtiments pour toute la plage temporelle, sans le bruit
+
+        Les tables de chaque type sont empilées en matrices (types x 13/24/7) puis
+        indexées en une seule opération par les composantes temporelles.
+
+        Args:
+            building_types: Types de bâtiments (une ligne de résultat par type)
+            months: Mois de chaque horodatage
+            hours: Heure de chaque horodatage
+            dayofweek: Jour de la semaine de chaque horodatage (0=lundi)
+            freq: Fréquence des données
+
+        Returns:
+            np.ndarray: Facteurs multiplicatifs, forme (types x horodatages)
+        """
+        tables = [self._profile_lookup_tables(building_type, freq) for building_type in building_types]
+        seasonal = np.vstack([table[0] for table in tables])
+        hourly = np.vstack([table[1] for table in tables])
+        daily = np.vstack([table[2] for table in tables])
+        return seasonal[:, months] * hourly[:, hours] * daily[:, dayofweek]
 
 # ==================== ROUTES FLASK ====================
 
 # Instance globale du générateur
 generator = MalaysiaDataGenerator()
 
+# Options d'écriture Parquet (zstd niveau 3, colonnes dictionnaire) et taille des row groups
+PARQUET_WRITE_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 3,
+    'use_dictionary': True
+}
+PARQUET_ROW_GROUP_ROWS = 256 * 1024
+
+# Clés sous lesquelles /generate expose les séries temporelles (noms flexibles du frontend)
+TIMESERIES_RESPONSE_KEYS = ('timeseries', 'consumption_data', 'data')
+
+# Nombre approximatif d'enregistrements par lot émis par /generate-stream
+STREAM_BATCH_ROWS = 100_000
+
+# Au-delà de ce nombre d'enregistrements, /generate envoie sa réponse en flux
+STREAM_RESPONSE_MIN_RECORDS = 200_000
+
+# Type MIME du flux Arrow IPC que /generate renvoie sur demande (en-tête Accept)
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Bannière de démarrage, assemblée une fois à l'import (hôte et port en arguments du log)
+STARTUP_BANNER = "\n".join((
+    "🇲🇾 Démarrage du Générateur de Données Énergétiques Malaysia",
+    "=" * 60,
+    "✅ Backend Flask initialisé",
+    "✅ Générateur de données prêt",
+    "✅ Endpoints API configurés",
+    "✅ Gestion d'erreurs en place",
+    "=" * 60,
+    "🚀 Serveur démarré sur http://%s:%s",
+    "📊 Interface utilisateur disponible à l'adresse racine",
+    "🔧 API endpoints disponibles pour la génération de données",
+))
+
+# Cache des dernières générations, partagé entre /generate et /download
+GENERATION_CACHE_SIZE = 4
+_generation_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_generation_cache_lock = threading.Lock()
+
 @app.route('/')
 def index():
     """Page d'accueil avec l'interface utilisateur"""
@@ -462,22 +1010,7 @@ def health_check():
 def get_cities():
     """Retourne la liste des villes malaysiennes disponibles"""
     try:
-        cities_data = []
-        for city_name, city_info in generator.malaysia_cities.items():
-            cities_data.append({
-                'name': city_name,
-                'state': city_info['state'],
-                'population': city_info['population'],
-                'lat': city_info['lat'],
-                'lon': city_info['lon'],
-                'type': city_info['type']
-            })
-        
-        return jsonify({
-            'success': True,
-            'cities': cities_data,
-            'total': len(cities_data)
-        })
+        return app.response_class(_cities_response_body(), mimetype='application/json')
     
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des villes: {str(e)}")
@@ -494,54 +1027,42 @@ def generate_data():
     """
     try:
         # Récupération et validation des paramètres
-        data = request.get_json()
-        if not data:
-            return jsonify({'success': False, 'error': 'Aucune donnée reçue'}), 400
+        params, error_response = _parse_generation_request(request.get_json())
+        if error_response:
+            return error_response
         
-        # Paramètres avec valeurs par défaut
-        num_buildings = int(data.get('num_buildings', 100))
-        start_date = data.get('start_date', '2024-01-01')
-        end_date = data.get('end_date', '2024-01-31')
-        freq = data.get('freq', 'D')
-        zone_data = data.get('zone_data', {})
-        osm_buildings = data.get('buildings_osm', [])
+        num_buildings = params['num_buildings']
+        start_date, end_date, freq = params['start_date'], params['end_date'], params['freq']
+        zone_data = params['zone_data']
+        osm_buildings = params['osm_buildings']
+        location = params['location']
         
-        # Validation des paramètres
-        if num_buildings < 1 or num_buildings > 10000:
-            return jsonify({'success': False, 'error': 'Nombre de bâtiments invalide (1-10000)'}), 400
+        logger.info(f"🚀 Génération démarrée: {num_buildings} bâtiments, {start_date} à {end_date}, freq={freq}")
         
-        try:
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            if start_dt >= end_dt:
-                return jsonify({'success': False, 'error': 'Date de fin doit être après date de début'}), 400
-        except ValueError:
-            return jsonify({'success': False, 'error': 'Format de date invalide'}), 400
+        # Métadonnées, séries temporelles et statistiques
+        buildings_metadata, timeseries_df, stats = _run_generation(
+            num_buildings, start_date, end_date, freq, location, osm_buildings
+        )
         
-        logger.info(f"🚀 Génération démarrée: {num_buildings} bâtiments, {start_date} à {end_date}, freq={freq}")
+        # Mémoriser le résultat pour un téléchargement ultérieur ; /download ne transmet
+        # pas de bâtiments OSM, une génération OSM n'y correspond donc à aucune requête
+        if not osm_buildings:
+            cache_key = _make_cache_key(num_buildings, start_date, end_date, freq, location)
+            _store_generation(cache_key, buildings_metadata, timeseries_df, stats)
         
-        # Déterminer la localisation
-        location = zone_data.get('name', 'Kuala Lumpur')
-        if location not in generator.malaysia_cities:
-            location = 'Kuala Lumpur'
+        # Client Arrow : séries temporelles en colonnes, sans passer par les enregistrements
+        arrow_response = PYARROW_AVAILABLE and _accepts_arrow_stream()
         
-        # Générer les métadonnées des bâtiments
-        buildings_metadata = generator.generate_buildings_metadata(
-            num_buildings=num_buildings,
-            location=location,
-            osm_buildings=osm_buildings
-        )
+        # Grosses générations : réponse en flux, les séries temporelles étant
+        # sérialisées par morceaux après l'envoi du reste du document
+        stream_response = not arrow_response and len(timeseries_df) > STREAM_RESPONSE_MIN_RECORDS
         
-        # Générer les séries temporelles
-        timeseries_data = generator.generate_consumption_timeseries(
-            buildings=buildings_metadata,
-            start_date=start_date,
-            end_date=end_date,
-            freq=freq
-        )
+        # Sérialisation en enregistrements une seule fois, à la frontière JSON
+        timeseries_data = None if arrow_response or stream_response else _records_payload(timeseries_df)
         
-        # Calculer les statistiques
-        stats = calculate_generation_stats(buildings_metadata, timeseries_data, start_date, end_date)
+        # Valeurs lues plusieurs fois dans la réponse
+        city_info = generator.malaysia_cities[location]
+        num_osm_buildings = len(osm_buildings) if osm_buildings else 0
         
         # FORMAT DE RÉPONSE STRUCTURÉ POUR LE FRONTEND
         response_data = {
@@ -552,7 +1073,7 @@ def generate_data():
                 'period': f"{start_date} → {end_date}",
                 'frequency': freq,
                 'total_buildings': len(buildings_metadata),
-                'total_records': len(timeseries_data),
+                'total_records': len(timeseries_df),
                 'data_quality': 'high' if osm_buildings else 'estimated',
                 'source': 'osm+synthetic' if osm_buildings else 'synthetic'
             },
@@ -573,10 +1094,10 @@ def generate_data():
             
             # INFORMATIONS DE QUALITÉ
             'data_quality': {
-                'osm_buildings': len(osm_buildings) if osm_buildings else 0,
-                'synthetic_buildings': len(buildings_metadata) - (len(osm_buildings) if osm_buildings else 0),
-                'total_records': len(timeseries_data),
-                'period_days': (end_dt - start_dt).days + 1,
+                'osm_buildings': num_osm_buildings,
+                'synthetic_buildings': len(buildings_metadata) - num_osm_buildings,
+                'total_records': len(timeseries_df),
+                'period_days': (params['end_dt'] - params['start_dt']).days + 1,
                 'frequency': freq,
                 'completeness': 100.0,
                 'accuracy': 95.0 if osm_buildings else 85.0
@@ -587,20 +1108,33 @@ def generate_data():
                 'version': '2.0',
                 'generator': 'malaysia-energy-generator',
                 'location': location,
-                'state': zone_data.get('state', generator.malaysia_cities[location]['state']),
+                'state': zone_data.get('state', city_info['state']),
                 'coordinates': {
-                    'lat': zone_data.get('lat', generator.malaysia_cities[location]['lat']),
-                    'lon': zone_data.get('lon', generator.malaysia_cities[location]['lon'])
+                    'lat': zone_data.get('lat', city_info['lat']),
+                    'lon': zone_data.get('lon', city_info['lon'])
                 }
             }
         }
         
-        logger.info(f"✅ Génération terminée avec succès: {len(buildings_metadata)} bâtiments, {len(timeseries_data)} enregistrements")
+        logger.info(f"✅ Génération terminée avec succès: {len(buildings_metadata)} bâtiments, {len(timeseries_df)} enregistrements")
+        if arrow_response:
+            for key in TIMESERIES_RESPONSE_KEYS:
+                del response_data[key]
+            return Response(
+                stream_with_context(_iter_arrow_stream(response_data, timeseries_df)),
+                mimetype=ARROW_STREAM_MIMETYPE
+            )
+        if stream_response:
+            for key in TIMESERIES_RESPONSE_KEYS:
+                del response_data[key]
+            return Response(
+                stream_with_context(_stream_response_json(response_data, timeseries_df)),
+                mimetype='application/json'
+            )
         return jsonify(response_data)
     
     except Exception as e:
-        logger.error(f"❌ Erreur lors de la génération: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception(f"❌ Erreur lors de la génération: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e),
@@ -634,23 +1168,13 @@ def generate_from_osm():
         # Utiliser tous les bâtiments OSM fournis
         location = zone_data.get('name', 'Kuala Lumpur')
         
-        # Générer les métadonnées à partir des bâtiments OSM
-        buildings_metadata = generator.generate_buildings_metadata(
-            num_buildings=len(osm_buildings),
-            location=location,
-            osm_buildings=osm_buildings
-        )
-        
-        # Générer les séries temporelles
-        timeseries_data = generator.generate_consumption_timeseries(
-            buildings=buildings_metadata,
-            start_date=start_date,
-            end_date=end_date,
-            freq=freq
+        # Métadonnées à partir des bâtiments OSM, séries temporelles et statistiques
+        buildings_metadata, timeseries_df, stats = _run_generation(
+            len(osm_buildings), start_date, end_date, freq, location, osm_buildings
         )
         
-        # Calculer les statistiques
-        stats = calculate_generation_stats(buildings_metadata, timeseries_data, start_date, end_date)
+        # Sérialisation en enregistrements une seule fois, à la frontière JSON
+        timeseries_data = _records_payload(timeseries_df)
         
         # Réponse structurée
         response_data = {
@@ -660,7 +1184,7 @@ def generate_from_osm():
                 'timestamp': datetime.now().isoformat(),
                 'location': location,
                 'osm_buildings_used': len(osm_buildings),
-                'total_records': len(timeseries_data),
+                'total_records': len(timeseries_df),
                 'period': f"{start_date} → {end_date}",
                 'frequency': freq
             },
@@ -675,7 +1199,7 @@ def generate_from_osm():
             }
         }
         
-        logger.info(f"✅ Génération OSM terminée: {len(timeseries_data)} enregistrements")
+        logger.info(f"✅ Génération OSM terminée: {len(timeseries_df)} enregistrements")
         return jsonify(response_data)
     
     except Exception as e:
@@ -686,30 +1210,87 @@ def generate_from_osm():
             'type': type(e).__name__
         }), 500
 
+@app.route('/generate-stream', methods=['POST'])
+def generate_stream():
+    """
+    Génère les séries temporelles en flux NDJSON (un enregistrement par ligne)
+    
+    Les bâtiments sont traités par lots : le client reçoit les premières lignes
+    dès que le premier lot est calculé, sans attendre la génération complète.
+    """
+    try:
+        params, error_response = _parse_generation_request(request.get_json())
+        if error_response:
+            return error_response
+        
+        start_date, end_date, freq = params['start_date'], params['end_date'], params['freq']
+        
+        buildings_metadata = generator.generate_buildings_metadata(
+            num_buildings=params['num_buildings'],
+            location=params['location'],
+            osm_buildings=params['osm_buildings']
+        )
+        
+        logger.info(f"🌊 Génération en flux: {len(buildings_metadata)} bâtiments, {start_date} à {end_date}, freq={freq}")
+        return Response(
+            stream_with_context(_iter_timeseries_ndjson(buildings_metadata, start_date, end_date, freq)),
+            mimetype='application/x-ndjson'
+        )
+    
+    except Exception as e:
+        logger.exception(f"❌ Erreur génération en flux: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'type': type(e).__name__
+        }), 500
+
 @app.route('/download/<format>')
 def download_data(format):
     """
     Endpoint pour télécharger les données générées
-    Formats supportés: json, csv, xlsx
+    Formats supportés: json, csv, xlsx, parquet
+    Paramètres de requête: num_buildings, start_date, end_date, freq, location
     """
     try:
-        # Pour la démo, retourner un exemple
-        # En production, il faudrait stocker les données générées
-        
-        if format not in ['json', 'csv', 'xlsx']:
+        if format not in ['json', 'csv', 'xlsx', 'parquet']:
             return jsonify({'error': 'Format non supporté'}), 400
         
-        # Exemple de données pour le téléchargement
-        sample_data = {
-            'metadata': {'generated_at': datetime.now().isoformat()},
-            'buildings': [],
-            'timeseries': []
-        }
+        # Mêmes paramètres, valeurs par défaut et validations que /generate ; la
+        # localisation est passée en paramètre de requête `location`
+        query = request.args.to_dict()
+        if 'location' in query:
+            query['zone_data'] = {'name': query.pop('location')}
+        params, error_response = _parse_generation_request(query)
+        if error_response:
+            return error_response
+        
+        # Réutiliser la génération correspondante si elle est en cache
+        generation = _get_or_generate(params)
         
         if format == 'json':
             filename = f"malaysia_energy_data_{datetime.now().strftime('%Y%m%d')}.json"
-            # Implémentation du téléchargement JSON
-            return jsonify(sample_data)
+            # Flux JSON par morceaux pour éviter de matérialiser tout le payload
+            return Response(
+                stream_with_context(_stream_generation_json(generation)),
+                mimetype='application/json',
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        
+        if format == 'parquet':
+            if not PYARROW_AVAILABLE:
+                return jsonify({'error': 'Export Parquet indisponible (pyarrow non installé)'}), 501
+            filename = f"malaysia_energy_timeseries_{datetime.now().strftime('%Y%m%d')}.parquet"
+            buffer = io.BytesIO()
+            _write_parquet_row_groups(generation['timeseries'], buffer)
+            buffer.seek(0)
+            return send_file(
+                buffer,
+                mimetype='application/octet-stream',
+                as_attachment=True,
+                download_name=filename,
+                max_age=0  # Génération propre à la requête : jamais mise en cache
+            )
         
         # Autres formats à implémenter
         return jsonify({'error': 'Format en développement'}), 501
@@ -720,8 +1301,337 @@ def download_data(format):
 
 # ==================== FONCTIONS UTILITAIRES ====================
 
+def _write_parquet_row_groups(timeseries: pd.DataFrame, sink) -> None:
+    """
+    Écrit la série temporelle en Parquet, un row group à la fois
+
+    Chaque tranche de PARQUET_ROW_GROUP_ROWS lignes est convertie en table Arrow puis
+    écrite : au plus deux tranches existent en mémoire côté Arrow, au lieu d'une copie
+    complète du DataFrame comme avec DataFrame.to_parquet. L'encodage/compression d'un
+    row group (pyarrow, sans GIL) se fait dans un thread pendant la conversion de la
+    tranche suivante ; un seul thread d'écriture garantit l'ordre des row groups.
+    """
+    schema = pa.Schema.from_pandas(timeseries.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(sink, schema, **PARQUET_WRITE_OPTIONS) as writer, \
+            ThreadPoolExecutor(max_workers=1) as executor:
+        pending_write = None
+        for start in range(0, len(timeseries), PARQUET_ROW_GROUP_ROWS):
+            chunk = timeseries.iloc[start:start + PARQUET_ROW_GROUP_ROWS]
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if pending_write is not None:
+                pending_write.result()
+            pending_write = executor.submit(writer.write_table, table)
+        if pending_write is not None:
+            pending_write.result()
+
+
+@lru_cache(maxsize=1)
+def _cities_response_body() -> str:
+    """
+    Sérialise une seule fois la liste des villes
+    
+    Les villes du générateur ne changent pas à l'exécution : le corps JSON de
+    /api/cities est donc construit au premier appel puis réutilisé.
+    """
+    cities_data = []
+    for city_name, city_info in generator.malaysia_cities.items():
+        cities_data.append({
+            'name': city_name,
+            'state': city_info['state'],
+            'population': city_info['population'],
+            'lat': city_info['lat'],
+            'lon': city_info['lon'],
+            'type': city_info['type']
+        })
+    
+    return app.json.dumps({
+        'success': True,
+        'cities': cities_data,
+        'total': len(cities_data)
+    })
+
+
+def _parse_generation_request(data: Optional[Dict]) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Response, int]]]:
+    """
+    Lit et valide les paramètres de génération communs à /generate, /generate-stream et /download
+    
+    Args:
+        data: Corps JSON de la requête
+        
+    Returns:
+        Tuple: (paramètres validés, None) ou (None, réponse d'erreur 400)
+    """
+    if not data:
+        return None, (jsonify({'success': False, 'error': 'Aucune donnée reçue'}), 400)
+    
+    try:
+        num_buildings = int(data.get('num_buildings', 100))
+    except (TypeError, ValueError):
+        return None, (jsonify({'success': False, 'error': 'Nombre de bâtiments invalide (1-10000)'}), 400)
+    
+    # Paramètres avec valeurs par défaut
+    params = {
+        'num_buildings': num_buildings,
+        'start_date': data.get('start_date', '2024-01-01'),
+        'end_date': data.get('end_date', '2024-01-31'),
+        'freq': data.get('freq', 'D'),
+        'zone_data': data.get('zone_data', {}),
+        'osm_buildings': data.get('buildings_osm', [])
+    }
+    
+    # Validation des paramètres
+    if params['num_buildings'] < 1 or params['num_buildings'] > 10000:
+        return None, (jsonify({'success': False, 'error': 'Nombre de bâtiments invalide (1-10000)'}), 400)
+    
+    try:
+        params['start_dt'] = datetime.strptime(params['start_date'], '%Y-%m-%d')
+        params['end_dt'] = datetime.strptime(params['end_date'], '%Y-%m-%d')
+    except ValueError:
+        return None, (jsonify({'success': False, 'error': 'Format de date invalide'}), 400)
+    if params['start_dt'] >= params['end_dt']:
+        return None, (jsonify({'success': False, 'error': 'Date de fin doit être après date de début'}), 400)
+    
+    # Déterminer la localisation
+    location = params['zone_data'].get('name', 'Kuala Lumpur')
+    params['location'] = location if location in generator.malaysia_cities else 'Kuala Lumpur'
+    return params, None
+
+
+def _run_generation(num_buildings: int, start_date: str, end_date: str, freq: str, location: str,
+                    osm_buildings: Optional[List[Dict]] = None) -> Tuple[List[Dict], pd.DataFrame, Dict]:
+    """
+    Pipeline de génération partagé par les routes : métadonnées, séries temporelles, statistiques
+    
+    Returns:
+        Tuple: (métadonnées des bâtiments, séries temporelles, statistiques)
+    """
+    buildings_metadata = generator.generate_buildings_metadata(
+        num_buildings=num_buildings,
+        location=location,
+        osm_buildings=osm_buildings
+    )
+    timeseries_df = generator.generate_consumption_timeseries(
+        buildings=buildings_metadata,
+        start_date=start_date,
+        end_date=end_date,
+        freq=freq
+    )
+    stats = calculate_generation_stats(buildings_metadata, timeseries_df, start_date, end_date)
+    return buildings_metadata, timeseries_df, stats
+
+
+def _make_cache_key(num_buildings: int, start_date: str, end_date: str,
+                    freq: str, location: str) -> str:
+    """Construit une clé canonique pour les paramètres de génération"""
+    return json.dumps({
+        'num_buildings': int(num_buildings),
+        'start_date': start_date,
+        'end_date': end_date,
+        'freq': freq,
+        'location': location
+    }, sort_keys=True)
+
+
+def _store_generation(key: str, buildings: List[Dict], timeseries: pd.DataFrame,
+                      stats: Dict) -> Dict[str, Any]:
+    """Stocke une génération dans le cache LRU en évinçant la plus ancienne et la retourne"""
+    generation = {
+        'buildings': buildings,
+        'timeseries': timeseries,
+        'statistics': stats,
+        'generated_at': datetime.now().isoformat()
+    }
+    with _generation_cache_lock:
+        _generation_cache[key] = generation
+        _generation_cache.move_to_end(key)
+        while len(_generation_cache) > GENERATION_CACHE_SIZE:
+            _generation_cache.popitem(last=False)
+    return generation
+
+
+def _accepts_arrow_stream() -> bool:
+    """Indique si le client préfère explicitement un flux Arrow IPC au JSON"""
+    # JSON en tête : un client sans préférence (Accept: */*) reste en JSON
+    best = request.accept_mimetypes.best_match(['application/json', ARROW_STREAM_MIMETYPE])
+    return best == ARROW_STREAM_MIMETYPE
+
+
+def _iter_arrow_stream(payload: Dict[str, Any], timeseries: pd.DataFrame):
+    """
+    Produit une réponse de génération en flux Arrow IPC, lot par lot
+    
+    La série temporelle est écrite en colonnes (lots de STREAM_BATCH_ROWS lignes) ;
+    le reste de la réponse est placé en JSON dans les métadonnées du schéma, sous la
+    clé `generation`. Chaque lot est converti puis envoyé avant le suivant : seul un
+    lot encodé existe en mémoire à côté du DataFrame. Côté client :
+    
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+        info = json.loads(table.schema.metadata[b'generation'])
+    
+    Args:
+        payload: Champs de la réponse, hors séries temporelles
+        timeseries: Série temporelle à encoder
+        
+    Yields:
+        bytes: Message IPC du schéma, puis un message par lot, puis la fin de flux
+    """
+    schema = pa.Schema.from_pandas(timeseries.iloc[:0], preserve_index=False)
+    schema = schema.with_metadata({
+        **(schema.metadata or {}),
+        b'generation': app.json.dumps(payload).encode('utf-8')
+    })
+    
+    buffer = io.BytesIO()
+    
+    def drain() -> bytes:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        yield drain()
+        for start in range(0, len(timeseries), STREAM_BATCH_ROWS):
+            chunk = timeseries.iloc[start:start + STREAM_BATCH_ROWS]
+            writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield drain()
+    yield drain()
+
+
+def _records_payload(df: pd.DataFrame) -> Any:
+    """
+    Prépare un DataFrame pour une réponse JSON au format enregistrements
+    
+    Avec orjson, le JSON est produit une seule fois par pandas et inséré tel quel
+    (orjson.Fragment), même si la réponse le référence sous plusieurs clés.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.Fragment(df.to_json(orient='records'))
+    return df.to_dict('records')
+
+
+def _json_default(obj: Any) -> Any:
+    """Convertit les scalaires NumPy pour la sérialisation JSON"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type non sérialisable: {type(obj).__name__}")
+
+
+def _stream_generation_json(generation: Dict[str, Any], chunk_size: int = 10000):
+    """
+    Produit le JSON d'une génération par morceaux
+    
+    Args:
+        generation: Génération issue du cache
+        chunk_size: Nombre d'enregistrements temporels par morceau
+        
+    Yields:
+        str: Fragments successifs du document JSON
+    """
+    metadata = {
+        'generated_at': generation['generated_at'],
+        'downloaded_at': datetime.now().isoformat()
+    }
+    yield '{"metadata":' + json.dumps(metadata)
+    yield ',"statistics":' + json.dumps(generation['statistics'], default=_json_default)
+    yield ',"buildings":' + json.dumps(generation['buildings'], default=_json_default)
+    
+    yield ',"timeseries":['
+    timeseries = generation['timeseries']
+    for start in range(0, len(timeseries), chunk_size):
+        chunk = timeseries.iloc[start:start + chunk_size].to_json(orient='records')
+        yield (',' if start else '') + chunk[1:-1]
+    yield ']}'
+
+
+def _stream_response_json(payload: Dict[str, Any], timeseries: pd.DataFrame, chunk_size: int = 10000):
+    """
+    Produit par morceaux un document JSON de réponse contenant des séries temporelles
+    
+    Les champs de `payload` sont sérialisés d'abord (en-têtes et début du corps
+    partent tout de suite), puis la série est émise par tranches sous chacune des
+    clés de TIMESERIES_RESPONSE_KEYS. Chaque tranche est resérialisée pour chaque
+    clé plutôt que conservée : la mémoire de pointe reste celle d'une tranche, au
+    prix de trois sérialisations de la série.
+    
+    Args:
+        payload: Champs de la réponse, hors séries temporelles
+        timeseries: Série temporelle à émettre en enregistrements
+        chunk_size: Nombre d'enregistrements par morceau
+        
+    Yields:
+        str: Fragments successifs du document JSON
+    """
+    head = app.json.dumps(payload)
+    yield head[:-1]
+    
+    for index, key in enumerate(TIMESERIES_RESPONSE_KEYS):
+        yield (',' if payload or index else '') + json.dumps(key) + ':['
+        for start in range(0, len(timeseries), chunk_size):
+            chunk = timeseries.iloc[start:start + chunk_size].to_json(orient='records')
+            yield (',' if start else '') + chunk[1:-1]
+        yield ']'
+    yield '}'
+
+
+def _iter_timeseries_ndjson(buildings: List[Dict], start_date: str, end_date: str, freq: str):
+    """
+    Produit les séries temporelles en NDJSON, lot de bâtiments par lot de bâtiments
+    
+    Args:
+        buildings: Métadonnées des bâtiments
+        start_date: Date de début
+        end_date: Date de fin
+        freq: Fréquence des données
+        
+    Yields:
+        str: Lignes NDJSON d'un lot (environ STREAM_BATCH_ROWS enregistrements)
+    """
+    num_timestamps = len(_date_components(start_date, end_date, freq)[0])
+    buildings_per_batch = max(1, STREAM_BATCH_ROWS // max(num_timestamps, 1))
+    
+    for start in range(0, len(buildings), buildings_per_batch):
+        batch_df = generator.generate_consumption_timeseries(
+            buildings=buildings[start:start + buildings_per_batch],
+            start_date=start_date,
+            end_date=end_date,
+            freq=freq
+        )
+        if not batch_df.empty:
+            yield batch_df.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+
+
+def _get_or_generate(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Récupère une génération depuis le cache ou la recalcule
+    
+    Args:
+        params: Paramètres validés par _parse_generation_request
+        
+    Returns:
+        Dict: Génération trouvée ou recalculée
+    """
+    num_buildings = params['num_buildings']
+    start_date, end_date, freq = params['start_date'], params['end_date'], params['freq']
+    location = params['location']
+    
+    key = _make_cache_key(num_buildings, start_date, end_date, freq, location)
+    with _generation_cache_lock:
+        generation = _generation_cache.get(key)
+        if generation is not None:
+            _generation_cache.move_to_end(key)
+    if generation is not None:
+        logger.info("♻️ Génération récupérée depuis le cache")
+        return generation
+    
+    buildings_metadata, timeseries_df, stats = _run_generation(
+        num_buildings, start_date, end_date, freq, location
+    )
+    return _store_generation(key, buildings_metadata, timeseries_df, stats)
+
+
 def calculate_generation_stats(buildings: List[Dict], 
-                             timeseries: List[Dict], 
+                             timeseries: pd.DataFrame, 
                              start_date: str, 
                              end_date: str) -> Dict:
     """
@@ -729,33 +1639,42 @@ def calculate_generation_stats(buildings: List[Dict],
     
     Args:
         buildings: Liste des bâtiments
-        timeseries: Données temporelles
+        timeseries: DataFrame des données temporelles
         start_date: Date de début
         end_date: Date de fin
         
     Returns:
         Dict: Statistiques calculées
     """
-    if not timeseries:
+    if timeseries.empty:
         return {'error': 'Aucune donnée temporelle pour calculer les statistiques'}
     
-    # Convertir en DataFrame pour les calculs
-    df = pd.DataFrame(timeseries)
+    df = timeseries
     
-    # Statistiques de base
-    total_consumption = df['consumption_kwh'].sum()
-    avg_consumption = df['consumption_kwh'].mean()
-    max_consumption = df['consumption_kwh'].max()
-    min_consumption = df['consumption_kwh'].min()
+    # Statistiques de base directement sur le tableau NumPy sous-jacent
+    consumption = df['consumption_kwh'].to_numpy()
+    total_consumption = float(consumption.sum())
+    avg_consumption = total_consumption / consumption.size
+    max_consumption = float(consumption.max())
+    min_consumption = float(consumption.min())
+    # Écart-type à partir de la moyenne déjà connue (np.std la recalculerait)
+    deviations = consumption - avg_consumption
+    std_consumption = (
+        float(np.sqrt(np.dot(deviations, deviations) / (consumption.size - 1)))
+        if consumption.size > 1 else 0.0
+    )
     
     # Statistiques par type de bâtiment
-    building_stats = df.groupby('building_class')['consumption_kwh'].agg([
+    building_type_stats = df.groupby('building_class', observed=True)['consumption_kwh'].agg([
         'count', 'mean', 'sum', 'std'
-    ]).round(2).to_dict()
+    ]).round(2)
+    building_stats = building_type_stats.to_dict()
     
-    # Statistiques temporelles
-    df['date'] = pd.to_datetime(df['ds']).dt.date
-    daily_stats = df.groupby('date')['consumption_kwh'].sum()
+    # Distribution par type dérivée des comptages déjà agrégés (pas de value_counts supplémentaire)
+    type_distribution = building_type_stats['count'].sort_values(ascending=False).to_dict()
+    
+    # Statistiques temporelles (le préfixe 'YYYY-MM-DD' de ds suffit, sans parsing de dates)
+    daily_stats = df['consumption_kwh'].groupby(df['ds'].str.slice(0, 10), sort=False).sum()
     
     return {
         'total_buildings': len(buildings),
@@ -766,9 +1685,9 @@ def calculate_generation_stats(buildings: List[Dict],
             'average_kwh': round(avg_consumption, 2),
             'max_kwh': round(max_consumption, 2),
             'min_kwh': round(min_consumption, 2),
-            'std_kwh': round(df['consumption_kwh'].std(), 2)
+            'std_kwh': round(std_consumption, 2)
         },
-        'building_type_distribution': df['building_class'].value_counts().to_dict(),
+        'building_type_distribution': type_distribution,
         'building_type_stats': building_stats,
         'daily_consumption_stats': {
             'max_daily': round(daily_stats.max(), 2),
@@ -793,7 +1712,8 @@ def not_found(error):
             '/health - Vérification de santé',
             '/api/cities - Liste des villes',
             '/generate - Génération de données',
-            '/generate-from-osm - Génération avec OSM'
+            '/generate-from-osm - Génération avec OSM',
+            '/generate-stream - Génération en flux NDJSON'
         ]
     }), 404
 
@@ -807,29 +1727,110 @@ def internal_error(error):
         'support': 'Vérifiez les logs du serveur'
     }), 500
 
+def _exit_on_sigterm(signum, frame) -> None:
+    """Convertit SIGTERM en sortie normale : les handlers atexit (vidage des logs) s'exécutent"""
+    raise SystemExit(0)
+
+
+def _warm_up() -> float:
+    """
+    Sert une petite génération avant l'ouverture du port
+    
+    Initialise les chemins de code de /generate (tables de profils, composantes de
+    dates, sérialisation JSON) pour que le premier vrai client n'en paie pas le coût ;
+    avec gunicorn --preload, les workers héritent de cet état.
+    
+    Returns:
+        float: Durée du préchauffage en secondes
+    """
+    start = time.perf_counter()
+    with app.test_client() as client:
+        for freq in ('D', 'H'):
+            client.post('/generate', json={'num_buildings': 10, 'freq': freq})
+    # Ne pas garder les générations de préchauffage dans le cache de téléchargement
+    with _generation_cache_lock:
+        _generation_cache.clear()
+    return time.perf_counter() - start
+
+
+def _run_gunicorn(host: str, port: int, workers: int) -> None:
+    """
+    Sert l'application avec gunicorn, workers forkés après chargement
+    
+    L'application et le générateur, déjà construits dans ce processus, sont
+    hérités par les workers (copie sur écriture) au lieu d'être reconstruits
+    par chacun d'eux.
+    
+    Args:
+        host: Adresse d'écoute
+        port: Port d'écoute
+        workers: Nombre de processus workers
+    """
+    def post_fork(server, worker):
+        # Le thread d'écriture des logs n'existe pas dans le worker forké : nouvelle
+        # file et nouveau listener propres au worker
+        global _log_listener
+        _log_listener = _start_log_listener()
+    
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'preload_app': True,
+        'post_fork': post_fork
+    }
+    
+    class GeneratorApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return app
+    
+    GeneratorApplication().run()
+
 # ==================== POINT D'ENTRÉE PRINCIPAL ====================
 
 if __name__ == '__main__':
-    logger.info("🇲🇾 Démarrage du Générateur de Données Énergétiques Malaysia")
-    logger.info("=" * 60)
-    logger.info("✅ Backend Flask initialisé")
-    logger.info("✅ Générateur de données prêt")
-    logger.info("✅ Endpoints API configurés")
-    logger.info("✅ Gestion d'erreurs en place")
-    logger.info("=" * 60)
-    
     # Configuration du serveur
     host = os.environ.get('HOST', '127.0.0.1')
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     
-    logger.info(f"🚀 Serveur démarré sur http://{host}:{port}")
-    logger.info("📊 Interface utilisateur disponible à l'adresse racine")
-    logger.info("🔧 API endpoints disponibles pour la génération de données")
+    # Bannière de démarrage émise en une seule écriture
+    logger.info(STARTUP_BANNER, host, port)
+    
+    # Arrêt propre sur SIGTERM (docker stop, rollout) ; gunicorn installe ses propres handlers
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
     
-    app.run(
-        host=host,
-        port=port,
-        debug=debug,
-        threaded=True
-    )
\ No newline at end of file
+    # Préchauffage de /generate avant le premier client (WARMUP=0 pour le désactiver)
+    if os.environ.get('WARMUP', '1') != '0':
+        try:
+            logger.info("✅ Warm-up terminé en %.2fs", _warm_up())
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up ignoré: {e}")
+    
+    # Profilage : serveur Werkzeug mono-thread pour une attribution fidèle des échantillons
+    profiling = app.config['PROFILE'] is not None
+    
+    # Production sur demande : SERVER=gunicorn (ignoré en debug ou en profilage)
+    use_gunicorn = os.environ.get('SERVER') == 'gunicorn' and not debug and not profiling
+    if use_gunicorn and not GUNICORN_AVAILABLE:
+        logger.warning("⚠️ SERVER=gunicorn demandé mais gunicorn n'est pas installé (pip install gunicorn)")
+    
+    if use_gunicorn and GUNICORN_AVAILABLE:
+        workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+        logger.info("🦄 Serveur gunicorn: %s workers, application préchargée", workers)
+        _run_gunicorn(host, port, workers)
+    else:
+        logger.info("ℹ️ Serveur de développement Werkzeug ; en production : "
+                    "SERVER=gunicorn WEB_CONCURRENCY=4 HOST=0.0.0.0 python app.py")
+        
+        # Pas de reloader : il relance un second processus qui réimporte le générateur
+        app.run(
+            host=host,
+            port=port,
+            debug=debug,
+            use_reloader=False,
+            threaded=not profiling
+        )
@@ -5,6 +5,7 @@ Version corrigee avec fonction d'integration manquante.
 """
 
 import requests
+import heapq
 import json
 import os
 import time
@@ -12,10 +13,41 @@ import random
 import logging
 import math
 from datetime import datetime, timedelta
+from operator import itemgetter
 from typing import Dict, List, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# Caracteres remplaces dans les noms de fichiers de cache
+_FILENAME_TRANS = str.maketrans({' ': '_', '/': '_'})
+
+# Plages de coordonnees connues des principales villes malaysiennes
+CITY_COORDINATE_RANGES = {
+    'Kuala Lumpur': {'lat': (3.1319, 3.1681), 'lon': (101.6841, 101.7381)},
+    'George Town': {'lat': (5.4000, 5.4300), 'lon': (100.3000, 100.3300)},
+    'Johor Bahru': {'lat': (1.4833, 1.5033), 'lon': (103.7333, 103.7533)},
+    'Langkawi': {'lat': (6.3167, 6.3367), 'lon': (99.8167, 99.8367)},
+    'Ipoh': {'lat': (4.5833, 4.6033), 'lon': (101.0833, 101.1033)},
+    'Shah Alam': {'lat': (3.0667, 3.1167), 'lon': (101.4833, 101.5333)},
+    'Petaling Jaya': {'lat': (3.1073, 3.1273), 'lon': (101.6063, 101.6263)},
+    'Kota Kinabalu': {'lat': (5.9667, 5.9867), 'lon': (116.0667, 116.0867)},
+    'Kuching': {'lat': (1.5333, 1.5533), 'lon': (110.3333, 110.3533)},
+    'Cyberjaya': {'lat': (2.9167, 2.9367), 'lon': (101.6333, 101.6533)},
+    'Malacca City': {'lat': (2.1896, 2.2096), 'lon': (102.2394, 102.2594)},
+    'Alor Setar': {'lat': (6.1088, 6.1288), 'lon': (100.3580, 100.3780)},
+    'Kuantan': {'lat': (3.8000, 3.8200), 'lon': (103.3200, 103.3400)}
+}
+
+# Villes couvertes par le generateur basique de secours
+BASIC_CITY_COORDINATE_RANGES = {
+    city: CITY_COORDINATE_RANGES[city]
+    for city in ('Kuala Lumpur', 'George Town', 'Johor Bahru', 'Langkawi', 'Ipoh',
+                 'Shah Alam', 'Petaling Jaya', 'Kota Kinabalu', 'Kuching')
+}
+
+# Plage generique pour la Malaisie (villes inconnues)
+MALAYSIA_COORDINATE_RANGE = {'lat': (1.0, 7.0), 'lon': (99.5, 119.5)}
+
 
 class AutomatedDistrictsManager:
     """
@@ -76,7 +108,7 @@ class AutomatedDistrictsManager:
             dict: Quartiers avec coordonnees et metadonnees
         """
         
-        cache_key = f"{city_name.lower().replace(' ', '_')}_{country.lower()}"
+        cache_key = self._cache_key(city_name, country)
         cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
         
         # Verifier le cache en premier
@@ -254,10 +286,14 @@ class AutomatedDistrictsManager:
             'cache_files': len([f for f in os.listdir(self.cache_dir) if f.endswith('.json')])
         }
     
+    def _cache_key(self, city_name: str, country: str = "Malaysia") -> str:
+        """Nom de fichier de cache d'une ville (espaces et '/' remplaces en un seul passage)"""
+        return f"{city_name.lower().translate(_FILENAME_TRANS)}_{country.lower()}"
+    
     def clear_cache(self, city_name: str = None):
         """Efface le cache pour une ville specifique ou tout le cache"""
         if city_name:
-            cache_key = f"{city_name.lower().replace(' ', '_')}_malaysia"
+            cache_key = self._cache_key(city_name)
             cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
             if os.path.exists(cache_file):
                 os.remove(cache_file)
@@ -332,8 +368,11 @@ class EnhancedCoordinatesGenerator:
             latitude = round(random.uniform(coords['lat'][0], coords['lat'][1]), 6)
             longitude = round(random.uniform(coords['lon'][0], coords['lon'][1]), 6)
             
-            logger.debug(f"Coordonnees ameliorees pour {building_type or 'batiment'} a {city_name}: "
-                        f"{latitude}, {longitude} dans {suitable_district['name']}")
+            # Appele pour chaque batiment : ne formater le message que si DEBUG est actif
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Coordonnees ameliorees pour %s a %s: %s, %s dans %s",
+                             building_type or 'batiment', city_name, latitude, longitude,
+                             suitable_district['name'])
             
             return (latitude, longitude)
             
@@ -350,16 +389,16 @@ class EnhancedCoordinatesGenerator:
             score = self._calculate_suitability_score(district_info, building_type)
             scored_districts.append((score, district_info))
         
-        # Trier par score decroissant
-        scored_districts.sort(key=lambda x: x[0], reverse=True)
+        # Seuls les 4 meilleurs quartiers ont un poids non nul : selection partielle
+        # par score decroissant (stable, comme un tri complet) au lieu de tout trier
+        scored_districts = heapq.nlargest(4, scored_districts, key=itemgetter(0))
         
         # Selectionner avec ponderation (favorise les meilleurs mais permet variete)
         if len(scored_districts) == 1:
             return scored_districts[0][1]
         
         # Selection ponderee : 60% chance pour le meilleur, 30% pour le 2e, etc.
-        weights = [0.6, 0.3, 0.08, 0.02] + [0.0] * max(0, len(scored_districts) - 4)
-        weights = weights[:len(scored_districts)]
+        weights = [0.6, 0.3, 0.08, 0.02][:len(scored_districts)]
         
         # Normaliser les poids
         total_weight = sum(weights)
@@ -404,37 +443,7 @@ class EnhancedCoordinatesGenerator:
     
     def _generate_generic_coordinates(self, city_name: str) -> Tuple[float, float]:
         """Genere des coordonnees generiques pour une ville"""
-        
-        # Coordonnees connues des principales villes malaysiennes
-        city_coordinates = {
-            'Kuala Lumpur': {'lat': (3.1319, 3.1681), 'lon': (101.6841, 101.7381)},
-            'George Town': {'lat': (5.4000, 5.4300), 'lon': (100.3000, 100.3300)},
-            'Johor Bahru': {'lat': (1.4833, 1.5033), 'lon': (103.7333, 103.7533)},
-            'Langkawi': {'lat': (6.3167, 6.3367), 'lon': (99.8167, 99.8367)},
-            'Ipoh': {'lat': (4.5833, 4.6033), 'lon': (101.0833, 101.1033)},
-            'Shah Alam': {'lat': (3.0667, 3.1167), 'lon': (101.4833, 101.5333)},
-            'Petaling Jaya': {'lat': (3.1073, 3.1273), 'lon': (101.6063, 101.6263)},
-            'Kota Kinabalu': {'lat': (5.9667, 5.9867), 'lon': (116.0667, 116.0867)},
-            'Kuching': {'lat': (1.5333, 1.5533), 'lon': (110.3333, 110.3533)},
-            'Cyberjaya': {'lat': (2.9167, 2.9367), 'lon': (101.6333, 101.6533)},
-            'Malacca City': {'lat': (2.1896, 2.2096), 'lon': (102.2394, 102.2594)},
-            'Alor Setar': {'lat': (6.1088, 6.1288), 'lon': (100.3580, 100.3780)},
-            'Kuantan': {'lat': (3.8000, 3.8200), 'lon': (103.3200, 103.3400)}
-        }
-        
-        if city_name in city_coordinates:
-            coords = city_coordinates[city_name]
-            lat_range = coords['lat']
-            lon_range = coords['lon']
-            
-            latitude = round(random.uniform(lat_range[0], lat_range[1]), 6)
-            longitude = round(random.uniform(lon_range[0], lon_range[1]), 6)
-        else:
-            # Coordonnees generiques pour la Malaisie
-            latitude = round(random.uniform(1.0, 7.0), 6)
-            longitude = round(random.uniform(99.5, 119.5), 6)
-        
-        return (latitude, longitude)
+        return _uniform_city_coordinates(city_name, CITY_COORDINATE_RANGES)
     
     def generate_detailed_coordinates(self, city_name: str, building_type: str) -> Dict:
         """
@@ -561,39 +570,24 @@ class BasicCoordinatesGenerator:
     
     def generate_coordinates(self, city_name: str, building_type: str = None) -> Tuple[float, float]:
         """Genere des coordonnees basiques pour une ville"""
-        
-        # Coordonnees basiques des principales villes
-        city_coordinates = {
-            'Kuala Lumpur': {'lat': (3.1319, 3.1681), 'lon': (101.6841, 101.7381)},
-            'George Town': {'lat': (5.4000, 5.4300), 'lon': (100.3000, 100.3300)},
-            'Johor Bahru': {'lat': (1.4833, 1.5033), 'lon': (103.7333, 103.7533)},
-            'Langkawi': {'lat': (6.3167, 6.3367), 'lon': (99.8167, 99.8367)},
-            'Ipoh': {'lat': (4.5833, 4.6033), 'lon': (101.0833, 101.1033)},
-            'Shah Alam': {'lat': (3.0667, 3.1167), 'lon': (101.4833, 101.5333)},
-            'Petaling Jaya': {'lat': (3.1073, 3.1273), 'lon': (101.6063, 101.6263)},
-            'Kota Kinabalu': {'lat': (5.9667, 5.9867), 'lon': (116.0667, 116.0867)},
-            'Kuching': {'lat': (1.5333, 1.5533), 'lon': (110.3333, 110.3533)}
-        }
-        
-        if city_name in city_coordinates:
-            coords = city_coordinates[city_name]
-            lat_range = coords['lat']
-            lon_range = coords['lon']
-            
-            latitude = round(random.uniform(lat_range[0], lat_range[1]), 6)
-            longitude = round(random.uniform(lon_range[0], lon_range[1]), 6)
-        else:
-            # Coordonnees generiques pour la Malaisie
-            latitude = round(random.uniform(1.0, 7.0), 6)
-            longitude = round(random.uniform(99.5, 119.5), 6)
-        
-        return (latitude, longitude)
+        return _uniform_city_coordinates(city_name, BASIC_CITY_COORDINATE_RANGES)
 
 
 # ===================================================================
 # FONCTIONS UTILITAIRES
 # ===================================================================
 
+def _uniform_city_coordinates(city_name: str, city_ranges: Dict) -> Tuple[float, float]:
+    """Tire un point uniforme dans la plage de la ville (plage Malaisie si inconnue)"""
+    coords = city_ranges.get(city_name, MALAYSIA_COORDINATE_RANGE)
+    lat_range = coords['lat']
+    lon_range = coords['lon']
+    
+    latitude = round(random.uniform(lat_range[0], lat_range[1]), 6)
+    longitude = round(random.uniform(lon_range[0], lon_range[1]), 6)
+    return (latitude, longitude)
+
+
 def test_enhanced_coordinates_system():
     """Fonction de test pour le systeme de coordonnees ameliore"""
     
@@ -176,38 +176,72 @@ def add_complete_osm_routes(app, generator):
     Ajoute les routes pour le support complet OSM
     """
     
+    @lru_cache(maxsize=1)
+    def _complete_zones_body():
+        """
+        Sérialise une seule fois la liste des zones (MALAYSIA_COMPLETE_ZONES est statique)
+        """
+        zones_data = []
+        for zone_name, zone_info in MALAYSIA_COMPLETE_ZONES.items():
+            zones_data.append({
+                'name': zone_name,
+                'type': zone_info['type'],
+                'state': zone_info['state'],
+                'population': zone_info['population'],
+                'center': zone_info['center'],
+                'bbox': zone_info['bbox'],
+                'estimated_buildings': zone_info['estimated_buildings'],
+                'area_km2': zone_info['area_km2'],
+                'osm_relation_id': zone_info.get('osm_relation_id'),
+                'complexity': get_zone_complexity(zone_info['estimated_buildings'])
+            })
+        
+        return app.json.dumps({
+            'success': True,
+            'zones': zones_data,
+            'total_zones': len(zones_data),
+            'total_estimated_buildings': sum(z['estimated_buildings'] for z in zones_data)
+        })
+    
     @app.route('/api/zones-complete')
     def get_complete_zones():
         """
         Retourne toutes les zones supportées avec leurs estimations
         """
         try:
-            zones_data = []
-            for zone_name, zone_info in MALAYSIA_COMPLETE_ZONES.items():
-                zones_data.append({
-                    'name': zone_name,
-                    'type': zone_info['type'],
-                    'state': zone_info['state'],
-                    'population': zone_info['population'],
-                    'center': zone_info['center'],
-                    'bbox': zone_info['bbox'],
-                    'estimated_buildings': zone_info['estimated_buildings'],
-                    'area_km2': zone_info['area_km2'],
-                    'osm_relation_id': zone_info.get('osm_relation_id'),
-                    'complexity': get_zone_complexity(zone_info['estimated_buildings'])
-                })
-            
-            return jsonify({
-                'success': True,
-                'zones': zones_data,
-                'total_zones': len(zones_data),
-                'total_estimated_buildings': sum(z['estimated_buildings'] for z in zones_data)
-            })
+            return app.response_class(_complete_zones_body(), mimetype='application/json')
         
         except Exception as e:
             logger.error(f"Erreur récupération zones: {str(e)}")
             return jsonify({'success': False, 'error': str(e)}), 500
     
+    @lru_cache(maxsize=None)
+    def _zone_estimation_body(zone_name):
+        """
+        Sérialise une seule fois l'estimation d'une zone (MALAYSIA_COMPLETE_ZONES est statique)
+        """
+        zone_data = MALAYSIA_COMPLETE_ZONES[zone_name]
+        
+        # Calculer les estimations
+        estimated_buildings = zone_data['estimated_buildings']
+        
+        estimation = {
+            'zone_name': zone_name,
+            'zone_type': zone_data['type'],
+            'estimated_buildings': estimated_buildings,
+            'estimated_load_time_minutes': calculate_load_time(estimated_buildings),
+            'estimated_data_size_mb': calculate_data_size(estimated_buildings),
+            'complexity_level': get_zone_complexity(estimated_buildings),
+            'recommended': estimated_buildings < 50000,
+            'warning_message': get_complexity_warning(estimated_buildings),
+            'zone_info': zone_data
+        }
+        
+        return app.json.dumps({
+            'success': True,
+            'estimation': estimation
+        })
+    
     @app.route('/api/zone-estimation/<zone_name>')
     def get_zone_estimation(zone_name):
         """
@@ -217,27 +251,7 @@ def add_complete_osm_routes(app, generator):
             if zone_name not in MALAYSIA_COMPLETE_ZONES:
                 return jsonify({'success': False, 'error': f'Zone {zone_name} non supportée'}), 404
             
-            zone_data = MALAYSIA_COMPLETE_ZONES[zone_name]
-            
-            # Calculer les estimations
-            estimated_buildings = zone_data['estimated_buildings']
-            
-            estimation = {
-                'zone_name': zone_name,
-                'zone_type': zone_data['type'],
-                'estimated_buildings': estimated_buildings,
-                'estimated_load_time_minutes': calculate_load_time(estimated_buildings),
-                'estimated_data_size_mb': calculate_data_size(estimated_buildings),
-                'complexity_level': get_zone_complexity(estimated_buildings),
-                'recommended': estimated_buildings < 50000,
-                'warning_message': get_complexity_warning(estimated_buildings),
-                'zone_info': zone_data
-            }
-            
-            return jsonify({
-                'success': True,
-                'estimation': estimation
-            })
+            return app.response_class(_zone_estimation_body(zone_name), mimetype='application/json')
         
         except Exception as e:
             logger.error(f"Erreur estimation zone {zone_name}: {str(e)}")
@@ -292,17 +306,17 @@ def add_complete_osm_routes(app, generator):
             logger.info(f"✅ {len(buildings_metadata)} métadonnées générées")
             
             # Générer les séries temporelles
-            timeseries_data = generator.generate_consumption_timeseries(
+            timeseries_df = generator.generate_consumption_timeseries(
                 buildings=buildings_metadata,
                 start_date=start_date,
                 end_date=end_date,
                 freq=freq
             )
             
-            logger.info(f"✅ {len(timeseries_data)} enregistrements temporels générés")
+            logger.info(f"✅ {len(timeseries_df)} enregistrements temporels générés")
             
             # Calculer les statistiques complètes
-            stats = calculate_complete_stats(buildings_metadata, timeseries_data, zone_data)
+            stats = calculate_complete_stats(buildings_metadata, timeseries_df, zone_data)
             
             # Analyser la distribution des bâtiments
             building_distribution = analyze_building_distribution(buildings_metadata)
@@ -311,7 +325,12 @@ def add_complete_osm_routes(app, generator):
             quality_metrics = calculate_osm_quality_metrics(osm_buildings, buildings_metadata)
             
             # Créer l'échantillon pour l'aperçu
-            sample_data = create_sample_data(buildings_metadata, timeseries_data)
+            sample_data = create_sample_data(buildings_metadata, timeseries_df)
+            
+            # Sérialisation en enregistrements uniquement à la frontière JSON
+            # (_records_payload d'app.py : fragment orjson, sans liste de dicts intermédiaire)
+            timeseries_data = _records_payload(timeseries_df)
+            num_records = len(timeseries_df)
             
             # Réponse complète et structurée
             response_data = {
@@ -330,7 +349,7 @@ def add_complete_osm_routes(app, generator):
                     'timestamp': datetime.now().isoformat(),
                     'total_buildings_requested': actual_buildings_count,
                     'total_buildings_processed': len(buildings_metadata),
-                    'total_timeseries_records': len(timeseries_data),
+                    'total_timeseries_records': num_records,
                     'period': f"{start_date} → {end_date}",
                     'frequency': freq,
                     'data_source': 'openstreetmap',
@@ -356,7 +375,7 @@ def add_complete_osm_routes(app, generator):
                     'buildings_per_km2': round(len(buildings_metadata) / zone_data['area_km2'], 2),
                     'data_density': get_data_density_level(len(buildings_metadata)),
                     'processing_complexity': get_zone_complexity(len(buildings_metadata)),
-                    'estimated_file_size_mb': calculate_data_size(len(timeseries_data))
+                    'estimated_file_size_mb': calculate_data_size(num_records)
                 },
                 
                 # Métadonnées pour l'export
@@ -370,13 +389,12 @@ def add_complete_osm_routes(app, generator):
             }
             
             logger.info(f"✅ Génération complète terminée pour {zone_name}")
-            logger.info(f"📊 {len(buildings_metadata)} bâtiments → {len(timeseries_data)} enregistrements")
+            logger.info(f"📊 {len(buildings_metadata)} bâtiments → {num_records} enregistrements")
             
             return jsonify(response_data)
         
         except Exception as e:
-            logger.error(f"❌ Erreur génération complète: {str(e)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception(f"❌ Erreur génération complète: {str(e)}")
             return jsonify({
                 'success': False,
                 'error': str(e),
@@ -440,11 +458,10 @@ def get_data_density_level(buildings_count):
 
 def calculate_complete_stats(buildings_metadata, timeseries_data, zone_data):
     """Calcule les statistiques complètes pour une zone"""
-    if not timeseries_data:
+    if timeseries_data.empty:
         return {'error': 'Aucune donnée temporelle'}
     
-    # Convertir en DataFrame pour analyses
-    df_timeseries = pd.DataFrame(timeseries_data)
+    df_timeseries = timeseries_data
     df_buildings = pd.DataFrame(buildings_metadata)
     
     # Statistiques de base
@@ -452,7 +469,7 @@ def calculate_complete_stats(buildings_metadata, timeseries_data, zone_data):
     avg_consumption = df_timeseries['consumption_kwh'].mean()
     
     # Statistiques par type de bâtiment
-    building_type_stats = df_timeseries.groupby('building_class')['consumption_kwh'].agg([
+    building_type_stats = df_timeseries.groupby('building_class', observed=True)['consumption_kwh'].agg([
         'count', 'mean', 'sum', 'std', 'min', 'max'
     ]).round(2)
     
@@ -500,10 +517,11 @@ def calculate_complete_stats(buildings_metadata, timeseries_data, zone_data):
 
 def analyze_building_distribution(buildings_metadata):
     """Analyse la distribution des types de bâtiments"""
-    df = pd.DataFrame(buildings_metadata)
-    
-    distribution = df['building_class'].value_counts()
-    total = len(df)
+    # Seule la colonne building_class est nécessaire : pas de DataFrame complet
+    distribution = pd.Series(
+        [building.get('building_class') for building in buildings_metadata]
+    ).value_counts()
+    total = len(buildings_metadata)
     
     analysis = {
         'total_buildings': total,
@@ -512,18 +530,21 @@ def analyze_building_distribution(buildings_metadata):
         'type_percentages': {}
     }
     
-    for building_type, count in distribution.items():
-        percentage = (count / total) * 100
-        analysis['type_percentages'][building_type] = {
-            'count': int(count),
-            'percentage': round(percentage, 1)
-        }
+    # Colonnes extraites une fois en tableaux NumPy plutôt qu'itérées élément par élément
+    counts = distribution.to_numpy()
+    shares = counts / total
+    analysis['type_percentages'] = {
+        building_type: {'count': count, 'percentage': percentage}
+        for building_type, count, percentage in zip(
+            distribution.index.tolist(), counts.tolist(), np.round(shares * 100, 1).tolist()
+        )
+    }
     
     # Calcul d'un score de diversité
     if len(distribution) > 1:
-        entropy = sum(-(count/total) * np.log2(count/total) for count in distribution.values())
+        entropy = -(shares * np.log2(shares)).sum()
         max_entropy = np.log2(len(distribution))
-        analysis['diversity_score'] = round((entropy / max_entropy) * 100, 1)
+        analysis['diversity_score'] = round(float(entropy / max_entropy) * 100, 1)
     else:
         analysis['diversity_score'] = 0
     
@@ -561,7 +582,7 @@ def calculate_osm_quality_metrics(osm_buildings, processed_buildings):
 def create_sample_data(buildings_metadata, timeseries_data, sample_size=10):
     """Crée un échantillon des données pour l'aperçu"""
     sample_buildings = buildings_metadata[:sample_size] if buildings_metadata else []
-    sample_timeseries = timeseries_data[:sample_size * 5] if timeseries_data else []  # 5 records per building
+    sample_timeseries = timeseries_data.head(sample_size * 5).to_dict('records')  # 5 records per building
     
     return {
         'buildings': sample_buildings,
@@ -6,6 +6,24 @@ Basé sur les caractéristiques démographiques et économiques réelles des vil
 
 import random
 import numpy as np
+from operator import itemgetter
+
+# Libellés des descriptions de ville (type principal, puis caractéristiques dans l'ordre d'affichage)
+CITY_TYPE_LABELS = {
+    'metropolis': "Métropole moderne",
+    'major_city': "Grande ville",
+    'state_capital': "Capitale d'état",
+    'heritage_city': "Ville historique",
+    'tourist_destination': "Destination touristique",
+    'industrial_city': "Centre industriel"
+}
+CITY_FEATURE_LABELS = (
+    ('economic_center', "centre économique"),
+    ('tourist_destination', "destination touristique"),
+    ('industrial_hub', "pôle industriel"),
+    ('port_city', "ville portuaire"),
+    ('university_city', "ville universitaire")
+)
 
 
 class BuildingDistributor:
@@ -367,7 +385,7 @@ class BuildingDistributor:
         remaining_buildings = total_buildings
         
         # Assigner les bâtiments en commençant par les plus importants
-        for building_type, percentage in sorted(distribution.items(), key=lambda x: x[1], reverse=True):
+        for building_type, percentage in sorted(distribution.items(), key=itemgetter(1), reverse=True):
             if remaining_buildings <= 0:
                 building_counts[building_type] = 0
                 continue
@@ -408,33 +426,43 @@ class BuildingDistributor:
         # Si c'est le premier appel pour cette ville, calculer la distribution
         if not hasattr(self, '_city_distributions'):
             self._city_distributions = {}
+            self._city_type_bounds = {}
         
         if city_name not in self._city_distributions:
-            self._city_distributions[city_name] = self.calculate_building_distribution(
+            distribution = self.calculate_building_distribution(
                 city_name, population, region, total_buildings_in_city
             )
+            self._city_distributions[city_name] = distribution
+            # Bornes cumulées des types : remplace la liste pondérée reconstruite à chaque appel
+            self._city_type_bounds[city_name] = (
+                list(distribution.keys()),
+                np.cumsum(list(distribution.values()))
+            )
         
-        distribution = self._city_distributions[city_name]
-        
-        # Créer une liste pondérée des types de bâtiments
-        building_types = []
-        for building_type, count in distribution.items():
-            building_types.extend([building_type] * count)
+        types, cumulative_counts = self._city_type_bounds[city_name]
+        total_assigned = cumulative_counts[-1] if len(cumulative_counts) > 0 else 0
         
-        if not building_types:
+        if total_assigned == 0:
             return 'Residential'  # Fallback
         
-        # Retourner un type aléatoire de la liste
-        if building_index < len(building_types):
-            return building_types[building_index]
+        # Type correspondant à la position du bâtiment dans la distribution
+        if building_index < total_assigned:
+            return types[int(np.searchsorted(cumulative_counts, building_index, side='right'))]
         else:
-            # Si on dépasse, utiliser un choix pondéré
-            weights = list(distribution.values())
-            types = list(distribution.keys())
+            # Si on dépasse, utiliser un choix pondéré par les effectifs
+            weights = np.diff(cumulative_counts, prepend=0) / total_assigned
             return np.random.choice(types, p=weights)
     
     def get_building_summary(self, city_name, population):
         """Retourne un résumé des types de bâtiments pour une ville"""
+        # Résumé mémorisé par (ville, population), comme les distributions par ville
+        if not hasattr(self, '_building_summaries'):
+            self._building_summaries = {}
+        
+        key = (city_name, population)
+        if key in self._building_summaries:
+            return self._building_summaries[key]
+        
         characteristics = self.get_city_characteristics(city_name, population)
         distribution = self.calculate_building_distribution(city_name, population, 'Unknown', 100)
         
@@ -445,34 +473,15 @@ class BuildingDistributor:
             'description': self._get_city_description(characteristics, population)
         }
         
+        self._building_summaries[key] = summary
         return summary
     
     def _get_city_description(self, characteristics, population):
         """Génère une description de la ville basée sur ses caractéristiques"""
-        descriptions = []
-        
-        if characteristics['type'] == 'metropolis':
-            descriptions.append("Métropole moderne")
-        elif characteristics['type'] == 'major_city':
-            descriptions.append("Grande ville")
-        elif characteristics['type'] == 'state_capital':
-            descriptions.append("Capitale d'état")
-        elif characteristics['type'] == 'heritage_city':
-            descriptions.append("Ville historique")
-        elif characteristics['type'] == 'tourist_destination':
-            descriptions.append("Destination touristique")
-        elif characteristics['type'] == 'industrial_city':
-            descriptions.append("Centre industriel")
-        
-        if characteristics['economic_center']:
-            descriptions.append("centre économique")
-        if characteristics['tourist_destination']:
-            descriptions.append("destination touristique")
-        if characteristics['industrial_hub']:
-            descriptions.append("pôle industriel")
-        if characteristics['port_city']:
-            descriptions.append("ville portuaire")
-        if characteristics['university_city']:
-            descriptions.append("ville universitaire")
+        type_label = CITY_TYPE_LABELS.get(characteristics['type'])
+        descriptions = (
+            *((type_label,) if type_label else ()),
+            *(label for key, label in CITY_FEATURE_LABELS if characteristics[key])
+        )
         
         return f"{population:,} hab. - " + ", ".join(descriptions)
\ No newline at end of file
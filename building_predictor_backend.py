@@ -7,6 +7,7 @@ Basé sur les vraies données officielles de Malaisie et algorithmes de distribu
 from flask import jsonify, request
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 import random
 
@@ -857,33 +858,38 @@ def create_prediction_routes(app, building_predictor_api):
                 'error': str(e)
             }), 500
     
+    @lru_cache(maxsize=1)
+    def _reference_data_body():
+        """Sérialise une seule fois les données de référence (fixées à l'initialisation)"""
+        return app.json.dumps({
+            'success': True,
+            'reference_cities': {
+                city: {
+                    'population': data['population'],
+                    'region': data['region'],
+                    'type': data['type'],
+                    'has_real_data': data['has_real_data'],
+                    'confidence': data['confidence'],
+                    'source': data['source']
+                }
+                for city, data in building_predictor_api.reference_data.items()
+            },
+            'city_type_ratios': building_predictor_api.city_type_ratios,
+            'all_cities': {
+                city: {
+                    'population': info['population'],
+                    'region': info['region'],
+                    'state': info.get('state', 'Unknown')
+                }
+                for city, info in building_predictor_api.malaysia_locations.items()
+            }
+        })
+    
     @app.route('/api/prediction-reference-data')
     def get_reference_data():
         """Retourne les données de référence pour le frontend"""
         try:
-            return jsonify({
-                'success': True,
-                'reference_cities': {
-                    city: {
-                        'population': data['population'],
-                        'region': data['region'],
-                        'type': data['type'],
-                        'has_real_data': data['has_real_data'],
-                        'confidence': data['confidence'],
-                        'source': data['source']
-                    }
-                    for city, data in building_predictor_api.reference_data.items()
-                },
-                'city_type_ratios': building_predictor_api.city_type_ratios,
-                'all_cities': {
-                    city: {
-                        'population': info['population'],
-                        'region': info['region'],
-                        'state': info.get('state', 'Unknown')
-                    }
-                    for city, info in building_predictor_api.malaysia_locations.items()
-                }
-            })
+            return app.response_class(_reference_data_body(), mimetype='application/json')
             
         except Exception as e:
             logger.error(f"Erreur API reference-data: {e}")
@@ -9,6 +9,8 @@ Auteur: Système de génération Malaysia
 
 import json
 import logging
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, List, Optional, Any
 from flask import jsonify, request
 
@@ -16,6 +18,18 @@ from flask import jsonify, request
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Liste des routes ajoutées, assemblée une fois à l'import
+PREDICTOR_ROUTES_BANNER = "\n".join((
+    "✅ Intégration complète du prédicteur créée avec succès",
+    "🔗 Routes ajoutées:",
+    "   • /api/predictor/predict - Prédiction principale",
+    "   • /api/predictor/stats - Statistiques",
+    "   • /api/predictor/compare - Comparaison",
+    "   • /api/predictor/city-analysis/<city> - Analyse ville",
+    "   • /api/predictor/custom-city - Ville personnalisée",
+    "   • /api/predictor/test - Tests et diagnostic"
+))
+
 
 class BuildingPredictorBackend:
     """
@@ -291,7 +305,7 @@ class BuildingPredictorBackend:
         assigned_buildings = 0
         
         # Trier par pourcentage décroissant
-        sorted_types = sorted(percentages.items(), key=lambda x: x[1], reverse=True)
+        sorted_types = sorted(percentages.items(), key=itemgetter(1), reverse=True)
         
         # Assigner les bâtiments (tous sauf le dernier)
         for i, (building_type, percentage) in enumerate(sorted_types[:-1]):
@@ -558,20 +572,23 @@ def create_complete_integration(app, generator):
                     'error': f'Erreur serveur: {str(e)}'
                 })
         
+        @lru_cache(maxsize=1)
+        def _predictor_stats_body():
+            """Sérialise une seule fois les statistiques (fixées une fois le générateur créé)"""
+            return app.json.dumps({
+                'success': True,
+                'stats': predictor_backend.get_prediction_stats(),
+                'backend_available': True,
+                'integration_version': '2.0'
+            })
+        
         @app.route('/api/predictor/stats')
         def api_predictor_stats():
             """
             API pour obtenir les statistiques du prédicteur
             """
             try:
-                stats = predictor_backend.get_prediction_stats()
-                
-                return jsonify({
-                    'success': True,
-                    'stats': stats,
-                    'backend_available': True,
-                    'integration_version': '2.0'
-                })
+                return app.response_class(_predictor_stats_body(), mimetype='application/json')
                 
             except Exception as e:
                 logger.error(f"❌ Erreur API stats prédicteur: {e}")
@@ -890,14 +907,7 @@ def create_complete_integration(app, generator):
         # FINALISATION
         # ===============================================================
         
-        logger.info("✅ Intégration complète du prédicteur créée avec succès")
-        logger.info(f"🔗 Routes ajoutées:")
-        logger.info("   • /api/predictor/predict - Prédiction principale")
-        logger.info("   • /api/predictor/stats - Statistiques")
-        logger.info("   • /api/predictor/compare - Comparaison")
-        logger.info("   • /api/predictor/city-analysis/<city> - Analyse ville")
-        logger.info("   • /api/predictor/custom-city - Ville personnalisée")
-        logger.info("   • /api/predictor/test - Tests et diagnostic")
+        logger.info(PREDICTOR_ROUTES_BANNER)
         
         return True
         
@@ -4,9 +4,12 @@ Version CORRIGÉE du système d'intégration avec validation réaliste.
 Corrige les problèmes de scores trop bas et améliore la logique de validation.
 """
 
+import heapq
 import json
 import os
 import pandas as pd
+from functools import cached_property
+from operator import itemgetter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
@@ -33,16 +36,23 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _format_top_city(rank: int, city: Dict) -> str:
+    """Ligne de rapport d'une ville parmi les meilleures performances"""
+    bonus_info = f" (+{city.get('coherence_bonus', 0):.1f} cohérence)" if city.get('coherence_bonus') else ""
+    return f"   {rank}. {city['city']}: {city['overall_score']}%{bonus_info} ({city.get('buildings_count', 0)} bât.)\n"
+
+
+def _format_flop_city(city: Dict) -> str:
+    """Ligne de rapport d'une ville nécessitant attention"""
+    return f"   • {city['city']}: {city['overall_score']}% ({city.get('buildings_count', 0)} bât.)\n"
+
+
 class FixedIntegratedValidator:
     """
     Système de validation intégré CORRIGÉ avec scores réalistes
     """
     
     def __init__(self):
-        if VALIDATION_AVAILABLE:
-            self.quick_validator = FixedQuickValidator()  # Version corrigée
-            self.building_distributor = BuildingDistributor()
-        
         # Seuils de qualité AJUSTÉS plus réalistes
         self.quality_thresholds = {
             'excellent': 80,    # AJUSTÉ: de 85 à 80
@@ -56,6 +66,20 @@ class FixedIntegratedValidator:
         self.validation_history = self._load_validation_history()
         
         logger.info("🔧 Système de validation CORRIGÉ initialisé avec seuils ajustés")
+    
+    @cached_property
+    def quick_validator(self) -> 'FixedQuickValidator':
+        """Validateur rapide corrigé, créé à la première validation"""
+        if not VALIDATION_AVAILABLE:
+            raise AttributeError("quick_validator")
+        return FixedQuickValidator()  # Version corrigée
+    
+    @cached_property
+    def building_distributor(self) -> 'BuildingDistributor':
+        """Distributeur de bâtiments, créé au premier usage"""
+        if not VALIDATION_AVAILABLE:
+            raise AttributeError("building_distributor")
+        return BuildingDistributor()
         
     def _load_validation_history(self) -> List[Dict]:
         """Charge l'historique des validations"""
@@ -159,12 +183,16 @@ class FixedIntegratedValidator:
         
         city_validations = []
         
-        # Grouper par ville
-        for city in buildings_df['location'].unique():
-            city_buildings = buildings_df[buildings_df['location'] == city]
+        # Comptages (ville x type) calculés en une seule passe
+        class_counts = pd.crosstab(buildings_df['location'], buildings_df['building_class'])
+        
+        # Grouper par ville (un seul passage au lieu d'un filtre booléen par ville)
+        for city, city_buildings in buildings_df.groupby('location', sort=False):
             
             # Créer la distribution pour cette ville
-            city_distribution = city_buildings['building_class'].value_counts().to_dict()
+            city_counts = class_counts.loc[city]
+            city_distribution = city_counts[city_counts > 0].sort_values(ascending=False).to_dict()
+            city_population = city_buildings['population'].iat[0] if len(city_buildings) > 0 else 0
             
             logger.info(f"🏙️ Validation {city}: {len(city_buildings)} bâtiments, {len(city_distribution)} types")
             
@@ -176,7 +204,7 @@ class FixedIntegratedValidator:
                 
                 # Ajouter des métadonnées
                 validation_result['buildings_count'] = len(city_buildings)
-                validation_result['population'] = city_buildings.iloc[0]['population'] if len(city_buildings) > 0 else 0
+                validation_result['population'] = city_population
                 validation_result['building_types_count'] = len(city_distribution)
                 
                 # Validation de cohérence supplémentaire
@@ -198,7 +226,7 @@ class FixedIntegratedValidator:
                     'status': 'ERROR_FALLBACK',
                     'error': str(e),
                     'buildings_count': len(city_buildings),
-                    'population': city_buildings.iloc[0]['population'] if len(city_buildings) > 0 else 0
+                    'population': city_population
                 })
         
         return city_validations
@@ -256,40 +284,55 @@ class FixedIntegratedValidator:
         }
         
         try:
+            # Mesures rattachées à chaque type via les couples (unique_id, type) distincts,
+            # puis une seule passe groupby au lieu d'un masque + isin par type de bâtiment.
+            # Un identifiant présent sous plusieurs types compte pour chacun d'eux.
+            id_classes = buildings_df[['unique_id', 'building_class']].drop_duplicates()
+            measures = timeseries_df[['unique_id', 'y']].merge(id_classes, on='unique_id')
+            measure_types = measures['building_class']
+            consumption = measures['y']
+            type_stats = consumption.groupby(measure_types, sort=False, observed=True).agg(
+                ['min', 'max', 'mean', 'std', 'count']
+            )
+            
+            # Seuils d'anomalie ajustés selon le type (plus tolérant pour les gros consommateurs)
+            sigma_factor = pd.Series(3, index=type_stats.index).mask(
+                type_stats.index.isin(['Hospital', 'Industrial', 'Factory']), 4
+            )
+            anomaly_thresholds = type_stats['mean'] + sigma_factor * type_stats['std']
+            extreme_mask = consumption > measure_types.map(anomaly_thresholds).astype(float)
+            extreme_stats = consumption[extreme_mask].groupby(
+                measure_types[extreme_mask], sort=False, observed=True
+            ).agg(['count', 'max'])
+            
             # Analyser par type de bâtiment avec seuils réalistes
             for building_type in buildings_df['building_class'].unique():
-                building_ids = buildings_df[buildings_df['building_class'] == building_type]['unique_id']
-                type_consumption = timeseries_df[timeseries_df['unique_id'].isin(building_ids)]['y']
+                if building_type not in type_stats.index:
+                    continue
+                type_row = type_stats.loc[building_type]
+                observations = int(type_row['count'])
                 
-                if len(type_consumption) > 0:
-                    consumption_validation['consumption_ranges'][building_type] = {
-                        'min': float(type_consumption.min()),
-                        'max': float(type_consumption.max()),
-                        'mean': float(type_consumption.mean()),
-                        'std': float(type_consumption.std()),
-                        'observations': len(type_consumption)
-                    }
-                    
-                    # Détecter anomalies avec seuils plus réalistes
-                    mean_val = type_consumption.mean()
-                    std_val = type_consumption.std()
-                    
-                    # Seuils d'anomalie ajustés selon le type
-                    if building_type in ['Hospital', 'Industrial', 'Factory']:
-                        anomaly_threshold = mean_val + 4 * std_val  # Plus tolérant
-                    else:
-                        anomaly_threshold = mean_val + 3 * std_val
-                    
-                    extreme_values = type_consumption[type_consumption > anomaly_threshold]
-                    
-                    if len(extreme_values) > len(type_consumption) * 0.02:  # Plus de 2%
-                        consumption_validation['anomalies'].append({
-                            'type': building_type,
-                            'issue': 'frequent_extreme_values',
-                            'frequency': len(extreme_values) / len(type_consumption),
-                            'max_value': float(extreme_values.max()),
-                            'expected_max': float(anomaly_threshold)
-                        })
+                consumption_validation['consumption_ranges'][building_type] = {
+                    'min': float(type_row['min']),
+                    'max': float(type_row['max']),
+                    'mean': float(type_row['mean']),
+                    'std': float(type_row['std']),
+                    'observations': observations
+                }
+                
+                # Détecter anomalies avec seuils plus réalistes
+                if building_type not in extreme_stats.index:
+                    continue
+                extreme_count = int(extreme_stats.at[building_type, 'count'])
+                
+                if extreme_count > observations * 0.02:  # Plus de 2%
+                    consumption_validation['anomalies'].append({
+                        'type': building_type,
+                        'issue': 'frequent_extreme_values',
+                        'frequency': extreme_count / observations,
+                        'max_value': float(extreme_stats.at[building_type, 'max']),
+                        'expected_max': float(anomaly_thresholds[building_type])
+                    })
             
             # Score de qualité AMÉLIORÉ
             quality_factors = []
@@ -599,24 +642,22 @@ Variance scores: {validation_session['overall_quality'].get('score_variance', 'N
 {'-'*35}
 """
         
-        # Trier les villes par score
-        cities_sorted = sorted(
-            validation_session['cities_analyzed'], 
-            key=lambda x: x['overall_score'], 
-            reverse=True
-        )
+        # Seuls le top 3 et les 2 derniers sont affichés : sélection partielle, sans tri complet
+        cities_analyzed = validation_session['cities_analyzed']
+        score_key = itemgetter('overall_score')
         
         # Top 3 villes
-        report += "🏆 MEILLEURES PERFORMANCES:\n"
-        for i, city in enumerate(cities_sorted[:3]):
-            bonus_info = f" (+{city.get('coherence_bonus', 0):.1f} cohérence)" if city.get('coherence_bonus') else ""
-            report += f"   {i+1}. {city['city']}: {city['overall_score']}%{bonus_info} ({city.get('buildings_count', 0)} bât.)\n"
+        report += "🏆 MEILLEURES PERFORMANCES:\n" + "".join([
+            _format_top_city(rank, city)
+            for rank, city in enumerate(heapq.nlargest(3, cities_analyzed, key=score_key), 1)
+        ])
         
         # Bottom 2 villes si plus de 3 villes
-        if len(cities_sorted) > 3:
-            report += "\n⚠️ NÉCESSITENT ATTENTION:\n"
-            for city in cities_sorted[-2:]:
-                report += f"   • {city['city']}: {city['overall_score']}% ({city.get('buildings_count', 0)} bât.)\n"
+        if len(cities_analyzed) > 3:
+            report += "\n⚠️ NÉCESSITENT ATTENTION:\n" + "".join([
+                _format_flop_city(city)
+                for city in reversed(heapq.nsmallest(2, cities_analyzed, key=score_key))
+            ])
         
         # Recommandations prioritaires
         if validation_session['recommendations']:
@@ -633,10 +674,11 @@ Variance scores: {validation_session['overall_quality'].get('score_variance', 'N
         # Ajustements appliqués
         if validation_session.get('adjustments_applied'):
             report += f"\n🔧 AJUSTEMENTS AUTOMATIQUES\n{'-'*35}\n"
-            for adj in validation_session['adjustments_applied']:
-                report += f"• {adj['description']}\n"
-                if 'expected_improvement' in adj:
-                    report += f"  → {adj['expected_improvement']}\n"
+            report += "".join([
+                f"• {adj['description']}\n"
+                + (f"  → {adj['expected_improvement']}\n" if 'expected_improvement' in adj else "")
+                for adj in validation_session['adjustments_applied']
+            ])
         
         # Validation des patterns de consommation
         if 'consumption_validation' in validation_session:
@@ -876,9 +918,7 @@ def generate():
         })
         
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"❌ Erreur de génération: {error_details}")
+        logger.exception("❌ Erreur de génération")
         return jsonify({
             'success': False, 
             'error': str(e),
@@ -7,14 +7,40 @@ Fichier: osm_generation_route.py
 
 import json
 import logging
+import zlib
 import pandas as pd
+import numpy as np
+from collections import Counter
 from datetime import datetime, timedelta
 from flask import request, jsonify
-import random
+from functools import lru_cache
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+# Table de remplacement des espaces pour les identifiants de zone
+_ID_TRANS = str.maketrans({' ': '_'})
+
+# Champs propres à chaque bâtiment dans convert_osm_to_buildings_df (les champs
+# de zone sont ajoutés comme scalaires) ; les 8 premiers précèdent les métadonnées OSM
+OSM_ROW_COLUMNS = (
+    'unique_id', 'building_id', 'latitude', 'longitude', 'state', 'region',
+    'building_class', 'cluster_size',
+    'osm_id', 'osm_type', 'osm_tags', 'osm_building_type', 'osm_name',
+    'osm_height', 'osm_levels', 'osm_area'
+)
+
+# Résumé d'une requête OSM : un seul enregistrement de log, formaté seulement s'il est émis
+OSM_REQUEST_SUMMARY = "Zone: %s\nBâtiments OSM: %s\nPériode: %s à %s\nFréquence: %s"
+
+@lru_cache(maxsize=256)
+def _location_id(zone_name):
+    """
+    Identifiant de localisation stable pour une zone (CRC32, identique d'une exécution à l'autre,
+    contrairement à hash() qui est salé par processus)
+    """
+    return f"OSM_{zlib.crc32(zone_name.encode('utf-8')) % 100000:05d}"
+
 def add_osm_routes(app, generator):
     """
     Ajoute les routes OSM à l'application Flask existante
@@ -41,10 +67,10 @@ def add_osm_routes(app, generator):
             end_date = data.get('end_date', '2024-01-31')
             freq = data.get('freq', '30T')
             
-            logger.info(f"Zone: {zone_data.get('name', 'Unknown')}")
-            logger.info(f"Bâtiments OSM: {len(buildings_osm)}")
-            logger.info(f"Période: {start_date} à {end_date}")
-            logger.info(f"Fréquence: {freq}")
+            logger.info(
+                OSM_REQUEST_SUMMARY,
+                zone_data.get('name', 'Unknown'), len(buildings_osm), start_date, end_date, freq
+            )
             
             # Validation des données
             if not buildings_osm:
@@ -173,11 +199,24 @@ def convert_osm_to_buildings_df(buildings_osm, zone_data):
     """
     Convertit les bâtiments OSM en DataFrame compatible avec votre système existant
     """
-    buildings_list = []
+    # Une ligne par bâtiment sous forme de tuple (champs variables, ordre OSM_ROW_COLUMNS),
+    # le DataFrame étant construit colonne par colonne à la fin
+    rows = []
     
     zone_name = zone_data.get('name', 'Unknown Zone')
     zone_center = zone_data.get('center', [3.1390, 101.6869])  # Défaut KL
     
+    # Identifiants de zone invariants, calculés une seule fois hors de la boucle
+    building_id_prefix = f"OSM_{zone_name.translate(_ID_TRANS)}_"
+    location_id = _location_id(zone_name)
+    
+    # Population constante pour toute la zone : estimée une fois, pas par bâtiment
+    zone_population = zone_data.get('population', estimate_population_from_zone(zone_data))
+    
+    # Suffixes aléatoires des identifiants uniques et tailles de cluster, tirés en un seul appel
+    id_suffixes = np.random.randint(10000, 100000, size=len(buildings_osm)).tolist()
+    cluster_sizes = np.random.randint(1, 21, size=len(buildings_osm)).tolist()
+    
     for i, building in enumerate(buildings_osm):
         if not building.get('geometry') or len(building['geometry']) < 3:
             continue
@@ -189,47 +228,85 @@ def convert_osm_to_buildings_df(buildings_osm, zone_data):
             center_lon = sum(point['lon'] for point in coords) / len(coords)
             
             # Déterminer le type de bâtiment selon vos catégories existantes
-            building_class = map_osm_to_building_class(building.get('tags', {}))
+            tags = building.get('tags', {})
+            building_class = map_osm_to_building_class(tags)
             
-            # Générer un ID unique
-            unique_id = f"OSM_{building.get('id', i)}_{random.randint(10000, 99999)}"
-            
-            # Créer l'entrée de bâtiment compatible avec votre système
-            building_data = {
-                'unique_id': unique_id,
-                'dataset': 'malaysia_electricity_osm',
-                'building_id': f"OSM_{zone_name.replace(' ', '_')}_{i:06d}",
-                'location_id': f"OSM_{hash(zone_name) % 100000:05d}",
-                'latitude': center_lat,
-                'longitude': center_lon,
-                'location': zone_name,
-                'state': determine_state_from_coords(center_lat, center_lon),
-                'region': determine_region_from_coords(center_lat, center_lon),
-                'population': zone_data.get('population', estimate_population_from_zone(zone_data)),
-                'timezone': 'Asia/Kuala_Lumpur',
-                'building_class': building_class,
-                'cluster_size': random.randint(1, 20),  # Basé sur la densité locale
-                'freq': '30T',
+            # Champs variables du bâtiment, dans l'ordre de OSM_ROW_COLUMNS
+            rows.append((
+                f"OSM_{building.get('id', i)}_{id_suffixes[i]}",  # Identifiant unique
+                f"{building_id_prefix}{i:06d}",
+                center_lat,
+                center_lon,
+                determine_state_from_coords(center_lat, center_lon),
+                determine_region_from_coords(center_lat, center_lon),
+                building_class,
+                cluster_sizes[i],  # Basé sur la densité locale
                 
                 # Métadonnées OSM additionnelles
-                'osm_id': building.get('id'),
-                'osm_type': building.get('type', 'way'),
-                'osm_tags': json.dumps(building.get('tags', {})),
-                'osm_building_type': building.get('tags', {}).get('building', 'yes'),
-                'osm_name': building.get('tags', {}).get('name'),
-                'osm_height': building.get('tags', {}).get('height'),
-                'osm_levels': building.get('tags', {}).get('building:levels'),
-                'osm_area': calculate_building_area(coords)
-            }
-            
-            buildings_list.append(building_data)
+                building.get('id'),
+                building.get('type', 'way'),
+                json.dumps(tags),
+                tags.get('building', 'yes'),
+                tags.get('name'),
+                tags.get('height'),
+                tags.get('building:levels'),
+                calculate_building_area(coords)
+            ))
             
         except Exception as e:
             logger.warning(f"Erreur traitement bâtiment OSM {building.get('id', i)}: {e}")
             continue
     
-    logger.info(f"✅ Conversion OSM: {len(buildings_list)} bâtiments traités")
-    return pd.DataFrame(buildings_list)
+    logger.info(f"✅ Conversion OSM: {len(rows)} bâtiments traités")
+    if not rows:
+        return pd.DataFrame()
+    
+    # Colonnes construites à partir des tuples transposés ; les champs communs à la
+    # zone sont des scalaires diffusés par pandas au lieu d'être répétés par ligne
+    columns = dict(zip(OSM_ROW_COLUMNS, zip(*rows)))
+    buildings_df = pd.DataFrame({
+        'unique_id': columns['unique_id'],
+        'dataset': 'malaysia_electricity_osm',
+        'building_id': columns['building_id'],
+        'location_id': location_id,
+        'latitude': columns['latitude'],
+        'longitude': columns['longitude'],
+        'location': zone_name,
+        'state': columns['state'],
+        'region': columns['region'],
+        'population': zone_population,
+        'timezone': 'Asia/Kuala_Lumpur',
+        'building_class': columns['building_class'],
+        'cluster_size': columns['cluster_size'],
+        'freq': '30T',
+        **{name: columns[name] for name in OSM_ROW_COLUMNS[8:]}
+    })
+    
+    # Types réduits : cluster_size (1-20) tient en int16, et les colonnes texte à peu de
+    # valeurs distinctes (classe, zone, état, région) ou constantes pour toute la zone
+    # (jeu de données, identifiant de zone, fuseau, fréquence), ainsi que les types OSM,
+    # en catégories
+    dtypes = {
+        'cluster_size': np.int16, 'building_class': 'category',
+        'location': 'category', 'state': 'category', 'region': 'category',
+        'dataset': 'category', 'location_id': 'category', 'timezone': 'category', 'freq': 'category',
+        'osm_type': 'category', 'osm_building_type': 'category'
+    }
+    # La population vient du client : réduite en int32 seulement si c'est un entier fini
+    # représentable, sinon transmise telle quelle (null, texte...)
+    if _is_int32_value(zone_population):
+        dtypes['population'] = np.int32
+    return buildings_df.astype(dtypes)
+
+
+def _is_int32_value(value):
+    """
+    Indique si une valeur est un nombre entier fini représentable en int32
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+        return False
+    int32 = np.iinfo(np.int32)
+    return bool(np.isfinite(value)) and float(value).is_integer() and int32.min <= value <= int32.max
 
 
 def map_osm_to_building_class(tags):
@@ -410,6 +487,16 @@ def calculate_osm_stats(buildings_df, timeseries_df, zone_data):
     """
     Calcule les statistiques complètes pour les données OSM
     """
+    # Statistiques de consommation sur le tableau NumPy sous-jacent : la moyenne est
+    # réutilisée pour l'écart-type au lieu de quatre réductions pandas indépendantes
+    consumption = timeseries_df['y'].to_numpy(dtype=float)
+    mean_consumption = consumption.sum() / consumption.size
+    deviations = consumption - mean_consumption
+    std_consumption = (
+        np.sqrt(np.dot(deviations, deviations) / (consumption.size - 1))
+        if consumption.size > 1 else np.nan
+    )
+    
     stats = {
         'buildings_count': len(buildings_df),
         'total_records': len(timeseries_df),
@@ -421,10 +508,10 @@ def calculate_osm_stats(buildings_df, timeseries_df, zone_data):
         },
         'building_distribution': buildings_df['building_class'].value_counts().to_dict(),
         'consumption_stats': {
-            'mean': float(timeseries_df['y'].mean()),
-            'max': float(timeseries_df['y'].max()),
-            'min': float(timeseries_df['y'].min()),
-            'std': float(timeseries_df['y'].std())
+            'mean': float(mean_consumption),
+            'max': float(consumption.max()),
+            'min': float(consumption.min()),
+            'std': float(std_consumption)
         },
         'date_range': {
             'start': timeseries_df['ds'].min().isoformat(),
@@ -505,13 +592,12 @@ def prepare_sample_data(buildings_df, timeseries_df):
     # Échantillon de bâtiments
     sample_buildings = buildings_df.head(5).to_dict('records')
     
-    # Échantillon de séries temporelles
-    sample_timeseries = timeseries_df.head(10).to_dict('records')
-    
-    # Convertir les timestamps en strings pour JSON
-    for record in sample_timeseries:
-        if 'ds' in record:
-            record['ds'] = record['ds'].isoformat()
+    # Échantillon de séries temporelles, timestamps convertis en chaînes ISO pour JSON
+    # en une opération sur la colonne (ds peut déjà être une chaîne)
+    timeseries_head = timeseries_df.head(10)
+    if 'ds' in timeseries_head and pd.api.types.is_datetime64_any_dtype(timeseries_head['ds']):
+        timeseries_head = timeseries_head.assign(ds=timeseries_head['ds'].dt.strftime('%Y-%m-%dT%H:%M:%S'))
+    sample_timeseries = timeseries_head.to_dict('records')
     
     return {
         'buildings_sample': sample_buildings,
@@ -538,18 +624,21 @@ def analyze_building_distribution(buildings_df):
         'diversity_score': 0
     }
     
-    for building_type, count in distribution.items():
-        percentage = (count / total) * 100
-        analysis['distribution'][building_type] = {
-            'count': int(count),
-            'percentage': round(percentage, 1)
-        }
+    # Colonnes extraites une fois en tableaux NumPy plutôt qu'itérées élément par élément
+    counts = distribution.to_numpy()
+    shares = counts / total
+    analysis['distribution'] = {
+        building_type: {'count': count, 'percentage': percentage}
+        for building_type, count, percentage in zip(
+            distribution.index.tolist(), counts.tolist(), np.round(shares * 100, 1).tolist()
+        )
+    }
     
     # Score de diversité (entropy simplifiée)
     if len(distribution) > 1:
-        entropy = sum(-(count/total) * np.log2(count/total) for count in distribution.values())
+        entropy = -(shares * np.log2(shares)).sum()
         max_entropy = np.log2(len(distribution))
-        analysis['diversity_score'] = round((entropy / max_entropy) * 100, 1)
+        analysis['diversity_score'] = round(float(entropy / max_entropy) * 100, 1)
     
     return analysis
 
@@ -561,20 +650,40 @@ def analyze_consumption_patterns(timeseries_df):
     if len(timeseries_df) == 0:
         return {'error': 'Aucune donnée de consommation'}
     
-    # Analyse par heure si possible
-    timeseries_df['hour'] = pd.to_datetime(timeseries_df['ds']).dt.hour
-    hourly_avg = timeseries_df.groupby('hour')['y'].mean()
+    # Toutes les statistiques portent sur le même tableau NumPy, extrait une seule fois
+    consumption = timeseries_df['y'].to_numpy(dtype=float)
+    
+    # Analyse par heure : la colonne brute est factorisée, puis seuls les horodatages
+    # distincts sont convertis (et non chaque ligne bâtiment x horodatage) ; l'heure
+    # est ensuite moyennée avec bincount
+    timestamp_codes, unique_timestamps = pd.factorize(timeseries_df['ds'])
+    hours = pd.DatetimeIndex(pd.to_datetime(unique_timestamps)).hour.to_numpy()[timestamp_codes]
+    hourly_counts = np.bincount(hours, minlength=24)
+    hourly_sums = np.bincount(hours, weights=consumption, minlength=24)
+    observed_hours = np.flatnonzero(hourly_counts)
+    hourly_avg = pd.Series(
+        hourly_sums[observed_hours] / hourly_counts[observed_hours],
+        index=observed_hours
+    )
     
     # Détection des pics
     peak_hours = hourly_avg.nlargest(3).index.tolist()
     low_hours = hourly_avg.nsmallest(3).index.tolist()
     
+    # Écart-type (ddof=1, comme pandas) à partir de la moyenne déjà calculée
+    mean_consumption = consumption.sum() / consumption.size
+    deviations = consumption - mean_consumption
+    std_consumption = (
+        np.sqrt(np.dot(deviations, deviations) / (consumption.size - 1))
+        if consumption.size > 1 else np.nan
+    )
+    
     return {
         'overall_stats': {
-            'mean_consumption': round(timeseries_df['y'].mean(), 2),
-            'max_consumption': round(timeseries_df['y'].max(), 2),
-            'min_consumption': round(timeseries_df['y'].min(), 2),
-            'std_consumption': round(timeseries_df['y'].std(), 2)
+            'mean_consumption': round(float(mean_consumption), 2),
+            'max_consumption': round(float(consumption.max()), 2),
+            'min_consumption': round(float(consumption.min()), 2),
+            'std_consumption': round(float(std_consumption), 2)
         },
         'temporal_patterns': {
             'peak_hours': peak_hours,
@@ -582,8 +691,8 @@ def analyze_consumption_patterns(timeseries_df):
             'hourly_average': hourly_avg.round(2).to_dict()
         },
         'data_quality': {
-            'zero_consumption_rate': round((timeseries_df['y'] == 0).sum() / len(timeseries_df) * 100, 2),
-            'outliers_rate': round((timeseries_df['y'] > timeseries_df['y'].quantile(0.99)).sum() / len(timeseries_df) * 100, 2)
+            'zero_consumption_rate': round(np.count_nonzero(consumption == 0) / consumption.size * 100, 2),
+            'outliers_rate': round(np.count_nonzero(consumption > np.quantile(consumption, 0.99)) / consumption.size * 100, 2)
         }
     }
 
@@ -595,16 +704,13 @@ def quick_analyze_osm_buildings(buildings_osm):
     if not buildings_osm:
         return {'error': 'Aucun bâtiment fourni'}
     
-    building_types = {}
+    # Tags lus une fois ; les types sont comptés par Counter en une passe C
+    buildings_tags = [building.get('tags', {}) for building in buildings_osm]
+    building_types = Counter(tags.get('building', 'unknown') for tags in buildings_tags)
     total_area = 0
     buildings_with_metadata = 0
     
-    for building in buildings_osm:
-        tags = building.get('tags', {})
-        building_type = tags.get('building', 'unknown')
-        
-        building_types[building_type] = building_types.get(building_type, 0) + 1
-        
+    for building, tags in zip(buildings_osm, buildings_tags):
         if building.get('geometry'):
             area = calculate_building_area(building['geometry'])
             total_area += area
@@ -614,10 +720,10 @@ def quick_analyze_osm_buildings(buildings_osm):
     
     return {
         'total_buildings': len(buildings_osm),
-        'building_types': building_types,
+        'building_types': dict(building_types),
         'estimated_total_area': round(total_area, 2),
         'metadata_completeness': round((buildings_with_metadata / len(buildings_osm)) * 100, 1),
-        'most_common_type': max(building_types.items(), key=lambda x: x[1])[0] if building_types else 'unknown'
+        'most_common_type': building_types.most_common(1)[0][0] if building_types else 'unknown'
     }
 
 
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Tests de non-régression des routes Flask du générateur
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from werkzeug.middleware.profiler import ProfilerMiddleware
+
+import app as app_module
+from app import app, create_app, generator, TIMESERIES_COLUMNS, PYARROW_AVAILABLE, NUMBA_AVAILABLE
+
+GENERATION_PARAMS = {'num_buildings': 5, 'start_date': '2024-01-01', 'end_date': '2024-01-10', 'freq': 'D'}
+
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.mark.parametrize('freq, num_timestamps', [('D', 10), ('H', 9 * 24 + 1)])
+def test_consumption_timeseries_shape_and_values(freq, num_timestamps):
+    """Une ligne par (bâtiment, horodatage), colonnes attendues, valeurs finies arrondies au centième"""
+    buildings = generator.generate_buildings_metadata(6, 'Ipoh')
+
+    timeseries = generator.generate_consumption_timeseries(buildings, '2024-01-01', '2024-01-10', freq)
+
+    assert isinstance(timeseries, pd.DataFrame)
+    assert list(timeseries.columns) == TIMESERIES_COLUMNS
+    assert len(timeseries) == len(buildings) * num_timestamps
+    assert (timeseries['unique_id'].value_counts() == num_timestamps).all()
+    assert set(timeseries['unique_id']) == {building['unique_id'] for building in buildings}
+
+    values = timeseries['y'].to_numpy(dtype=float)
+    assert np.isfinite(values).all()
+    assert np.array_equal(values, np.round(values, 2))
+    assert np.array_equal(values, timeseries['consumption_kwh'].to_numpy(dtype=float))
+    assert np.median(values) > 0
+    assert str(timeseries['ds'].iloc[0]).startswith('2024-01-01')
+    assert str(timeseries['ds'].iloc[-1]).startswith('2024-01-10')
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba non installé")
+def test_numba_kernel_matches_numpy_path():
+    """Le noyau numba, utilisé dès que numba est installé, reproduit le calcul NumPy"""
+    rng = np.random.default_rng(0)
+    num_buildings, num_timestamps, num_classes = 300, 500, 4
+    noise = rng.standard_normal((num_buildings, num_timestamps))
+    class_profiles = rng.uniform(0.4, 1.5, size=(num_classes, num_timestamps))
+    class_codes = rng.integers(0, num_classes, size=num_buildings).astype(np.int8)
+    base_consumption = rng.lognormal(5, 0.5, size=num_buildings)
+    noise_scale = rng.uniform(0.05, 0.6, size=num_buildings)
+
+    expected = app_module._consumption_matrix_numpy(
+        noise.copy(), class_profiles, class_codes, base_consumption, noise_scale
+    )
+    actual = noise.copy()
+    app_module._consumption_kernel(actual, class_profiles, class_codes, base_consumption, noise_scale)
+
+    # Seul un arrondi au centième à la frontière près peut différer
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=0.01 + 1e-9)
+    assert np.mean(actual != expected) < 1e-3
+
+
+def test_consumption_timeseries_without_buildings_is_empty():
+    timeseries = generator.generate_consumption_timeseries([], '2024-01-01', '2024-01-10')
+    assert timeseries.empty
+
+
+def test_generate_returns_timeseries_under_every_key(client):
+    response = client.post('/generate', json=GENERATION_PARAMS)
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['success'] is True
+    assert payload['generation_info']['total_records'] == 50
+    assert len(payload['metadata']) == 5
+    assert len(payload['timeseries']) == 50
+    assert payload['timeseries'] == payload['consumption_data'] == payload['data']
+    assert set(payload['timeseries'][0]) == set(TIMESERIES_COLUMNS)
+    assert payload['statistics']['total_records'] == 50
+
+
+def test_generate_streams_large_responses_as_valid_json(client, monkeypatch):
+    """Au-delà de STREAM_RESPONSE_MIN_RECORDS, même document JSON mais envoyé en flux"""
+    monkeypatch.setattr(app_module, 'STREAM_RESPONSE_MIN_RECORDS', 10)
+
+    response = client.post('/generate', json=GENERATION_PARAMS)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    payload = json.loads(response.get_data(as_text=True))
+    assert payload['success'] is True
+    assert len(payload['timeseries']) == 50
+    assert payload['timeseries'] == payload['consumption_data'] == payload['data']
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {**GENERATION_PARAMS, 'num_buildings': 'abc'},
+    {**GENERATION_PARAMS, 'num_buildings': 20000},
+    {**GENERATION_PARAMS, 'start_date': '2024-02-01'},
+    {**GENERATION_PARAMS, 'end_date': '10/01/2024'},
+])
+def test_generate_rejects_invalid_parameters(client, body):
+    response = client.post('/generate', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_generate_stream_emits_one_ndjson_line_per_record(client):
+    response = client.post('/generate-stream', json=GENERATION_PARAMS)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 50
+    assert set(json.loads(lines[0])) == set(TIMESERIES_COLUMNS)
+
+
+def test_download_json_contains_whole_generation(client):
+    query = '&'.join(f'{key}={value}' for key, value in GENERATION_PARAMS.items())
+
+    response = client.get(f'/download/json?{query}')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    payload = json.loads(response.get_data(as_text=True))
+    assert set(payload) == {'metadata', 'statistics', 'buildings', 'timeseries'}
+    assert len(payload['buildings']) == 5
+    assert len(payload['timeseries']) == 50
+
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow non installé")
+def test_download_parquet_round_trips(client):
+    query = '&'.join(f'{key}={value}' for key, value in GENERATION_PARAMS.items())
+
+    response = client.get(f'/download/parquet?{query}')
+
+    assert response.status_code == 200
+    timeseries = pd.read_parquet(io.BytesIO(response.get_data()))
+    assert list(timeseries.columns) == TIMESERIES_COLUMNS
+    assert len(timeseries) == 50
+
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow non installé")
+def test_generate_arrow_stream_is_sent_batch_by_batch(client, monkeypatch):
+    """Accept Arrow : réponse en flux, un lot IPC par tranche de STREAM_BATCH_ROWS lignes"""
+    import pyarrow as pa
+
+    monkeypatch.setattr(app_module, 'STREAM_BATCH_ROWS', 20)
+
+    response = client.post('/generate', json=GENERATION_PARAMS, headers={'Accept': app_module.ARROW_STREAM_MIMETYPE})
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    batches = list(pa.ipc.open_stream(response.get_data()))
+    assert [batch.num_rows for batch in batches] == [20, 20, 10]
+    table = pa.Table.from_batches(batches)
+    assert table.column_names == TIMESERIES_COLUMNS
+    generation = json.loads(table.schema.metadata[b'generation'])
+    assert generation['generation_info']['total_records'] == 50
+    assert len(generation['metadata']) == 5
+
+
+@pytest.mark.parametrize('fmt, status', [('xml', 400), ('csv', 501)])
+def test_download_unsupported_formats(client, fmt, status):
+    query = '&'.join(f'{key}={value}' for key, value in GENERATION_PARAMS.items())
+    assert client.get(f'/download/{fmt}?{query}').status_code == status
+
+
+def test_generate_stream_is_not_compressed(client):
+    """Les réponses en flux restent en flux : pas de compression qui les matérialiserait"""
+    assert app.config['COMPRESS_STREAMS'] is False
+
+    response = client.post(
+        '/generate-stream',
+        json={'num_buildings': 3, 'start_date': '2024-01-01', 'end_date': '2024-01-05'},
+        headers={'Accept-Encoding': 'gzip, br'}
+    )
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('query', [
+    'num_buildings=abc',
+    'num_buildings=0',
+    'num_buildings=10001',
+    'num_buildings=5&start_date=2024-02-01&end_date=2024-01-01',
+    'num_buildings=5&start_date=2024-13-01',
+    '',
+])
+def test_download_rejects_invalid_parameters(client, query):
+    """/download valide ses paramètres comme /generate (400, jamais 500 ni génération non bornée)"""
+    response = client.get(f'/download/json?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_download_reuses_generation_from_generate(client):
+    """Une génération de /generate est servie telle quelle par /download avec les mêmes paramètres"""
+    params = {'num_buildings': 4, 'start_date': '2024-01-01', 'end_date': '2024-01-03', 'freq': 'D'}
+    generated = client.post('/generate', json={**params, 'zone_data': {'name': 'Ipoh'}}).get_json()
+
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    downloaded = client.get(f'/download/json?{query}&location=Ipoh').get_json()
+
+    assert [b['unique_id'] for b in downloaded['buildings']] == [b['unique_id'] for b in generated['metadata']]
+    assert downloaded['timeseries'] == generated['timeseries']
+
+
+def test_download_never_serves_osm_generation(client):
+    """Une génération OSM n'est pas mise en cache : /download régénère des bâtiments synthétiques"""
+    params = {'num_buildings': 2, 'start_date': '2024-01-01', 'end_date': '2024-01-03', 'freq': 'D'}
+    osm_buildings = [{'id': 111, 'type': 'house'}, {'id': 222, 'type': 'office'}]
+    generated = client.post('/generate', json={**params, 'buildings_osm': osm_buildings}).get_json()
+    assert [b['building_id'] for b in generated['metadata']] == [111, 222]
+
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    downloaded = client.get(f'/download/json?{query}').get_json()
+
+    assert all(str(b['building_id']).startswith('synthetic_') for b in downloaded['buildings'])
+
+
+def test_generation_cache_survives_concurrent_requests(monkeypatch):
+    """Recherche et stockage concurrents avec évictions : jamais de KeyError"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(app_module, '_run_generation', lambda *args: ([], pd.DataFrame(), {}))
+    params = [
+        {'num_buildings': n % 8 + 1, 'start_date': '2024-01-01', 'end_date': '2024-01-02', 'freq': 'D', 'location': 'Ipoh'}
+        for n in range(2000)
+    ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        generations = list(executor.map(app_module._get_or_generate, params))
+
+    assert all(generation['buildings'] == [] for generation in generations)
+    assert len(app_module._generation_cache) <= app_module.GENERATION_CACHE_SIZE
+
+
+@pytest.mark.parametrize('value', ['0', 'false', 'yes'])
+def test_profile_ignores_unknown_values(monkeypatch, tmp_path, value):
+    """Seuls PROFILE=1 et PROFILE=pyinstrument activent le profilage"""
+    monkeypatch.setenv('PROFILE', value)
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+
+    profiled_app = create_app()
+
+    assert profiled_app.config['PROFILE'] is None
+    assert not isinstance(profiled_app.wsgi_app, ProfilerMiddleware)
+
+
+def test_profile_one_installs_profiler_middleware(monkeypatch, tmp_path):
+    monkeypatch.setenv('PROFILE', '1')
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+
+    profiled_app = create_app()
+
+    assert profiled_app.config['PROFILE'] == '1'
+    assert isinstance(profiled_app.wsgi_app, ProfilerMiddleware)
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests de la validation des patterns de consommation (versions intégrée et corrigée)
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(params=['integration_validation', 'integration_validation_fixed'])
+def validator(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Historique de validation écrit hors du dépôt
+    module = importlib.import_module(request.param)
+    return module.FixedIntegratedValidator()
+
+
+def test_consumption_ranges_count_ids_listed_under_several_classes(validator):
+    """Un identifiant présent sous deux types compte pour chacun, comme le filtrage isin par type"""
+    buildings_df = pd.DataFrame({
+        'unique_id': ['a', 'b', 'a', 'c'],
+        'building_class': ['Residential', 'Residential', 'Office', 'Hospital']
+    })
+    timeseries_df = pd.DataFrame({
+        'unique_id': np.repeat(['a', 'b', 'c', 'unknown'], 10),
+        'y': np.arange(40, dtype=float)
+    })
+
+    ranges = validator._validate_consumption_patterns_fixed(buildings_df, timeseries_df)['consumption_ranges']
+
+    assert set(ranges) == {'Residential', 'Office', 'Hospital'}
+    assert ranges['Residential']['observations'] == 20
+    assert ranges['Office'] == {'min': 0.0, 'max': 9.0, 'mean': 4.5, 'std': pytest.approx(np.std(np.arange(10), ddof=1)), 'observations': 10}
+    assert ranges['Hospital']['min'] == 20.0
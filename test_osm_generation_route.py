@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests de la conversion et de l'analyse des données OSM
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from osm_generation_route import analyze_consumption_patterns, convert_osm_to_buildings_df
+
+OSM_BUILDINGS = [
+    {
+        'id': 1,
+        'type': 'way',
+        'tags': {'building': 'house'},
+        'geometry': [{'lat': 3.1, 'lon': 101.6}, {'lat': 3.1001, 'lon': 101.6}, {'lat': 3.1001, 'lon': 101.6001}]
+    }
+]
+
+
+def test_zone_population_is_narrowed_to_int32():
+    buildings_df = convert_osm_to_buildings_df(OSM_BUILDINGS, {'name': 'Kuala Lumpur', 'population': 1800000})
+
+    assert buildings_df['population'].dtype == np.int32
+    assert buildings_df['population'].iloc[0] == 1800000
+
+
+@pytest.mark.parametrize('population', [None, 1.5, float('nan'), '1800000', 10 ** 12])
+def test_zone_population_is_passed_through_when_not_int32(population):
+    """Population nulle ou non entière envoyée par le client : transmise telle quelle, sans erreur"""
+    buildings_df = convert_osm_to_buildings_df(OSM_BUILDINGS, {'name': 'Kuala Lumpur', 'population': population})
+
+    assert len(buildings_df) == 1
+    assert buildings_df['population'].dtype != np.int32
+
+
+def test_hourly_average_matches_per_row_parsing():
+    timestamps = pd.date_range('2024-01-01', periods=48, freq='30min').strftime('%Y-%m-%d %H:%M:%S')
+    timeseries_df = pd.DataFrame({
+        'ds': np.tile(timestamps, 3),
+        'y': np.random.default_rng(0).uniform(10, 100, size=3 * len(timestamps))
+    })
+
+    patterns = analyze_consumption_patterns(timeseries_df)
+
+    expected = timeseries_df.groupby(pd.to_datetime(timeseries_df['ds']).dt.hour)['y'].mean().round(2)
+    assert patterns['temporal_patterns']['hourly_average'] == expected.to_dict()